@@ -0,0 +1,328 @@
+# -*- coding: utf-8 -*-
+
+#==============================================================================#
+# Author(s)  : Filippo AGNELLI (LMS / X / CNRS)                                #
+#              e-mail: filippo.agnelli@polytechnique.edu                       #
+#==============================================================================#
+# Description: Benchmarks of the hot paths of the geometry chain, on the       #
+#              shipped b-splines and on scaled-up synthetic inputs. Every      #
+#              result is checked against reference arrays, every run appends   #
+#              its times to a JSON lines history and is compared to the best   #
+#              previous time of each case. The references were computed by     #
+#              the original implementation of each case (geomdl evaluation and #
+#              fit, bisection, merged pyvista meshes, save_meshio), except the #
+#              grid surface meshes that it did not have; update=True replaces  #
+#              them by the results of the current code.                        #
+#==============================================================================#
+# Version    : v.2026-10-17 .......................................... pass    #
+#==============================================================================#
+# Risks      : times depend on the machine, compare runs of the same host      #
+#==============================================================================#
+
+# Options
+update=False              # set to True to rewrite the reference arrays (once)
+synthetic=True                # set to True to run the scaled-up inputs as well
+repeat=3                                 # best time of repeat runs of each case
+slowdown=1.5              # flag cases slower than slowdown x their best time
+
+# Loading external modules
+import ast
+import json
+import os
+import platform
+import socket
+import tempfile
+import time
+
+import numpy as np
+from geomdl import exchange                           # import & export b-spline
+from geomdl import multi                                     # geomdl containers
+from geomdl import operations
+
+from bsplinefit import bSplineFitBatch
+from bsplinestore import loadbspline, loadmesh, syncbspline
+from bsplinebasis import curvepoints
+from bsplinetransform import transform, reflection, rotation
+from bspline2mesh import bspline2mesh, dichotomysolver
+from mesh2file import arrays2file, meshcells
+from options import setoptions, srcdir
+
+#==============================================================================#
+# Input arguments
+
+idirname=srcdir+'../b-spline/'
+bdirname=srcdir+'../benchmark/'
+reffile=bdirname+'reference.npz'                            # reference arrays
+histfile=bdirname+'history.jsonl'                      # one line per run
+
+listnu=['-0.0','-0.2','-0.4','-0.6','-0.8']
+
+tol=1e-9                            # max deviation from the reference arrays
+stride=101            # rows kept in the references of the synthetic results
+
+#==============================================================================#
+# Inputs
+
+def basecurve(nu):
+    """
+    Base curve of nu, in 3D.
+    """
+    curve=exchange.import_json(idirname+'micro_nu='+nu+'_base_2d-curve.json')[0]
+    operations.add_dimension(curve, inplace=True)
+    return curve
+
+def cross(l0, container):
+    """
+    Cross of the 4 rotations of l0 about its first control point, as the cell
+    scripts.
+    """
+    cross0=container()
+    cross0.add([l0]+[transform(l0, rotation(a, l0.ctrlpts[0])) for a in (90, 180, 270)])
+    return cross0
+
+def scriptfunction(script, name):
+    """
+    Function name of a script, compiled alone from its source (importing a
+    script would run it), with the globals of the benchmark.
+    """
+    with open(srcdir+script) as f:
+        tree=ast.parse(f.read())
+    node=[n for n in tree.body if isinstance(n, ast.FunctionDef) and n.name==name]
+    glob=dict(globals())
+    exec(compile(ast.Module(node, type_ignores=[]), srcdir+script, 'exec'), glob)
+    return glob[name]
+
+symmetry=scriptfunction('micro_base2cell_2d-curve.py', 'symmetry')
+symmetry3d=scriptfunction('ribbon_base2cell_3d-surf.py', 'symmetry3d')
+
+def cell(cross0, container):
+    """
+    Unit cell of a cross, symmetrized about x=0.5 and y=0.5 as the cell
+    scripts.
+    """
+    cross1=symmetry(cross0, (0.5,0.,0.), (0.5,1.,0.))
+    cross2=symmetry(cross1, (0.,0.5,0.), (1.,0.5,0.))
+    cross3=symmetry(cross0, (0.,0.5,0.), (1.,0.5,0.))
+    cell0=container()
+    for c in (cross0, cross1, cross2, cross3):
+        cell0.add(c)
+    return cell0
+
+def surfcell():
+    """
+    Unit cell of shipped ribbon surfaces.
+    """
+    cell0=multi.SurfaceContainer()
+    cell0.add(exchange.import_json(idirname+'ribbon_cell_3d-surf.json'))
+    return cell0
+
+def tiled(cell0, n):
+    """
+    Container of n x n translated copies of a cell (scaled-up input).
+    """
+    big=multi.SurfaceContainer()
+    for i in range(n):
+        for j in range(n):
+            m=np.eye(4); m[:2,3]=[i, j]
+            big.add(transform(cell0, m))
+    return big
+
+def ctrlpts(obj):
+    """
+    Stacked control points of all shapes of a b-spline or container.
+    """
+    return np.concatenate([np.array(s.ctrlpts) for s in (obj if isinstance(obj, multi.AbstractContainer) else [obj])])
+
+def meshdict(mesh):
+    """
+    Node and connectivity arrays of a mesh.
+    """
+    points, cells=meshcells(mesh)
+    return dict(points=points, cells=cells)
+
+#==============================================================================#
+# Cases: name -> (setup, run), run(*setup()) returns a dict of arrays
+
+def fitsetup(npts):
+    clouds=[curvepoints(basecurve(nu), np.linspace(0, 1, npts))[:,:2] for nu in listnu]
+    return clouds, 3, 5
+
+def fitrun(clouds, degree, num_cpts):
+    return dict(ctrlpts=np.array(bSplineFitBatch(clouds, degree, num_cpts, clouds[0][0], clouds[0][-1])))
+
+def dichotomysetup(nlevels):
+    return surfcell(), np.linspace(0., 1., nlevels)
+
+def dichotomyrun(cell0, lz):
+    return dict(u=np.array([dichotomysolver(s, lz) for s in cell0]))
+
+def curvemeshsetup(dens):
+    cells=[cell(cross(basecurve(nu), multi.CurveContainer), multi.CurveContainer) for nu in listnu]
+    return cells, dens
+
+def curvemeshrun(cells, dens):
+    ld=[meshdict(bspline2mesh(c, dens)) for c in cells]
+    return dict(points=np.concatenate([d['points'] for d in ld]),
+                cells=np.concatenate([d['cells'] for d in ld]))
+
+def surfmeshsetup(dens, n=1, mode='tri'):
+    return tiled(surfcell(), n) if n>1 else surfcell(), dens, mode
+
+def surfmeshrun(cell0, dens, mode):
+    return meshdict(bspline2mesh(cell0, dens, mode))
+
+def symmetrysetup(n):
+    curves=[cross(basecurve(nu), multi.CurveContainer) for nu in listnu]
+    return curves, tiled(surfcell(), n) if n>1 else surfcell()
+
+def symmetryrun(curves, surfs):
+    c=[cell(c0, multi.CurveContainer) for c0 in curves]
+    s=symmetry3d(surfs, (0.5,0.,0.), (0.5,1.,0.))
+    return dict(curves=np.concatenate([ctrlpts(ci) for ci in c]), surfs=ctrlpts(s))
+
+def jsonsetup(n):
+    return tiled(surfcell(), n) if n>1 else surfcell(),
+
+def jsonrun(cell0):
+    with tempfile.TemporaryDirectory() as tmp:
+        exchange.export_json(cell0, tmp+'/cell.json')
+        back=exchange.import_json(tmp+'/cell.json')
+    return dict(ctrlpts=np.concatenate([np.array(s.ctrlpts) for s in back]))
+
+def storesetup(n):
+    tmp=tempfile.TemporaryDirectory()              # removed with the setup args
+    exchange.export_json(tiled(surfcell(), n) if n>1 else surfcell(), tmp.name+'/cell.json')
+    syncbspline(tmp.name+'/cell.json')
+    return tmp, tmp.name+'/cell.json'
+
+def storerun(tmp, ifile):
+    return dict(ctrlpts=np.concatenate([s['ctrlpts'] for s in loadbspline(ifile)]))
+
+def exportsetup(dens, n=1):
+    return meshcells(bspline2mesh(tiled(surfcell(), n) if n>1 else surfcell(), dens, 'tri'))
+
+def exportrun(points, cells):
+    with tempfile.TemporaryDirectory() as tmp:
+        arrays2file(points, cells, {fmt:tmp+'/mesh.'+fmt for fmt in ('abaqus', 'avsucd', 'stl', 'npz')})
+        points, cells=loadmesh(tmp+'/mesh.npz')
+        return dict(points=np.array(points), cells=np.array(cells))
+
+def savemeshiosetup(dens, n=1):
+    return bspline2mesh(tiled(surfcell(), n) if n>1 else surfcell(), dens, 'tri'),
+
+def savemeshiorun(mesh):
+    import meshio                               # meshio is imported when needed
+    import pyvista as pv                       # pyvista is imported when needed
+    with tempfile.TemporaryDirectory() as tmp:
+        pv.save_meshio(tmp+'/mesh.avs', mesh, file_format='avsucd')
+        pv.save_meshio(tmp+'/mesh.inp', mesh, file_format='abaqus')
+        pv.save_meshio(tmp+'/mesh.stl', mesh, file_format='stl', binary=True)
+        back=meshio.read(tmp+'/mesh.inp')
+        return dict(points=back.points, cells=back.cells[0].data)
+
+cases={'fit':                 (lambda: fitsetup(200),             fitrun),
+       'dichotomy':           (lambda: dichotomysetup(51),        dichotomyrun),
+       'mesh curve':          (lambda: curvemeshsetup(15),        curvemeshrun),
+       'mesh surface':        (lambda: surfmeshsetup(15),         surfmeshrun),
+       'symmetry':            (lambda: symmetrysetup(1),          symmetryrun),
+       'json':                (lambda: jsonsetup(1),              jsonrun),
+       'store':               (lambda: storesetup(1),             storerun),
+       'export':              (lambda: exportsetup(15),           exportrun),
+       'save_meshio':         (lambda: savemeshiosetup(15),       savemeshiorun)}
+
+synthcases={'fit x1000':           (lambda: fitsetup(200000),          fitrun),
+            'dichotomy x400':      (lambda: dichotomysetup(20000),     dichotomyrun),
+            'mesh curve x100':     (lambda: curvemeshsetup(1500),      curvemeshrun),
+            'mesh surface 4x4':    (lambda: surfmeshsetup(30, 4),      surfmeshrun),
+            'symmetry 8x8':        (lambda: symmetrysetup(8),          symmetryrun),
+            'json 4x4':            (lambda: jsonsetup(4),              jsonrun),
+            'store 4x4':           (lambda: storesetup(4),             storerun),
+            'export 2x2':          (lambda: exportsetup(30, 2),        exportrun),
+            'save_meshio 2x2':     (lambda: savemeshiosetup(30, 2),    savemeshiorun)}
+
+#==============================================================================#
+# Runner
+
+def besttime(run, args, repeat):
+    """
+    Best wall time of repeat runs, and the result of the last one.
+    """
+    times=[]
+    for k in range(repeat):
+        t0=time.perf_counter()
+        res=run(*args)
+        times.append(time.perf_counter()-t0)
+    return min(times), res
+
+def checkresult(name, res, ref, step, tol):
+    """
+    Deviation of a result from the reference arrays ({name/key: array},
+    rows strided by step), None if there is no reference.
+    """
+    dev=0.
+    for key, arr in res.items():
+        k=name+'/'+key
+        if k not in ref:
+            return None
+        arr=np.asarray(arr)
+        if tuple(ref[k+'/shape'])!=arr.shape:
+            return np.inf
+        dev=max(dev, float(np.abs(arr[::step].astype(float)-ref[k]).max(initial=0.)))
+    return dev
+
+def history(histfile, host):
+    """
+    Best previous time of every case on host, from the history file.
+    """
+    best=dict()
+    if os.path.isfile(histfile):
+        with open(histfile) as f:
+            for line in f:
+                entry=json.loads(line)
+                if entry.get('host')!=host:
+                    continue
+                for c in entry['cases']:
+                    best[c['name']]=min(best.get(c['name'], np.inf), c['time'])
+    return best
+
+def runbenchmark(cases, synthcases=(), repeat=3, update=False):
+    """
+    Time every case, check its result and append the run to the history.
+
+    :return: run entry (machine, versions, cases with time and status)
+    """
+    ref=dict(np.load(reffile)) if os.path.isfile(reffile) and not update else dict()
+    newref=dict()
+    best=history(histfile, socket.gethostname())
+    lc=[]
+    for name, (setup, run) in list(cases.items())+list(dict(synthcases).items()):
+        step=stride if name in dict(synthcases) else 1
+        t, res=besttime(run, setup(), repeat)
+        dev=checkresult(name, res, ref, step, tol)
+        status='new' if dev is None else ('ok' if dev<=tol else 'wrong')
+        if t>slowdown*best.get(name, np.inf):
+            status+=' slow'
+        lc.append(dict(name=name, time=t, status=status, deviation=dev,
+                       best=best.get(name)))
+        for key, arr in res.items():
+            arr=np.asarray(arr)
+            newref[name+'/'+key]=arr[::step]; newref[name+'/'+key+'/shape']=arr.shape
+        print('%-20s %10.4f s  %-10s %s'%(name, t, status, '' if dev is None else '%.1e'%dev))
+
+    entry=dict(date=time.strftime('%Y-%m-%dT%H:%M:%S'), host=socket.gethostname(),
+               machine=platform.machine(), python=platform.python_version(),
+               numpy=np.__version__, repeat=repeat, cases=lc)
+    os.makedirs(bdirname, exist_ok=True)
+    with open(histfile, 'a') as f:
+        f.write(json.dumps(entry)+'\n')
+    if update or not os.path.isfile(reffile):
+        np.savez_compressed(reffile, **newref)
+    return entry
+
+if __name__=='__main__':
+    setoptions(globals())                  # key=value options of command line
+    entry=runbenchmark(cases, synthcases if synthetic else (), repeat, update)
+    if any(c['status'].startswith('wrong') for c in entry['cases']):
+        exit(1)
+
+#==============================================================================#
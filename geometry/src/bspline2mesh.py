@@ -14,66 +14,457 @@
 #==============================================================================#
 
 import numpy as np
-import pyvista as pv
 
-def dichotomysolver(bspline, z):
-    
-    vmax=1; vmin=0;                              # second curvilinear coordinate
+from bsplinebasis import evalcurve, derivctrlpts, evalsurfgrid, memobasis, curvecurvature
+from bsplinebasis import curvepoints, surfpoints, evalrows
+from meshweld import weldmap, roundedmap, weldmeshes, orientcells, flipcells
+from mesh2file import arrays2polydata, meshcells
+from instrument import stage, count
+
+precisions={'double':(np.float64, np.int64),      # dtypes of points and cells
+            'single':(np.float32, np.int32)}
+
+def levelsolver(degree, kv, zc, zl, tol=1e-10, maxiter=100):
+    """
+    Parameters u such that z(u)=zl for many z-curves at once (same knot
+    vector), curve k being solved at its levels zl[k]: Newton steps inside a
+    bisection bracket. Levels out of range give nan.
 
-    zmax=bspline.evaluate_single([vmax,0])[2]
-    zmin=bspline.evaluate_single([vmin,0])[2]
-    zsol=0
+    :param zc: control points of the z-curves (m, ncp)
+    :param zl: levels (m, n)
+    :return: u (m, n)
+    """
+    kv=np.asarray(kv, dtype=float)
+    zc=np.asarray(zc, dtype=float)
+    zl=np.asarray(zl, dtype=float)
+    dzc, dkv=derivctrlpts(degree, kv, zc.T)
+    dzc=dzc.T
+
+    z0, z1=evalrows(degree, kv, zc, np.tile([0., 1.], (len(zc), 1))).T[:,:,None]
+    sg=np.where(z1>=z0, 1., -1.)                      # increasing or decreasing
 
-    # if we are at the boundary the solution is known.
-    if   zmax==z: return float(vmax) 
-    elif zmin==z: return float(vmin)
-        
     # Check that our z in within our interval.
-    if (zmax<z) or (zmin>z):
+    ok=(zl>=np.minimum(z0, z1)) & (zl<=np.maximum(z0, z1))
+
+    # initial guess: interpolation on the Greville abscissae
+    gre=np.convolve(kv[1:-1], np.ones(degree)/degree, mode='valid')
+    u=np.array([np.interp(s[0]*l, s[0]*c, gre) for s, l, c in zip(sg, zl, zc)])
+    u=np.where(zl==z0, 0., np.where(zl==z1, 1., u))  # solution known at boundary
+    lo=np.zeros_like(zl); hi=np.ones_like(zl)
+    for it in range(maxiter):
+        f=sg*(evalrows(degree, kv, zc, u)-zl)
+        todo=ok & (np.abs(f)>tol) & (hi-lo>1e-15)
+        if not todo.any(): break
+        lo=np.where(f<0, u, lo); hi=np.where(f>0, u, hi)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            un=u-f/(sg*evalrows(degree-1, dkv, dzc, u))
+        newton=(un>lo) & (un<hi)
+        un=np.where(newton, un, 0.5*(lo+hi))               # bisection fallback
+        u=np.where(todo, un, u)
+        count('solver iterations', todo.sum())
+        count('bisections', (todo & ~newton).sum())
+
+    return np.where(ok, u, np.nan)
+
+def dichotomysolver(bspline, z, tol=1e-10, maxiter=100):
+    """
+    First curvilinear coordinate u such that z(u,0)=z, for a scalar or an
+    array of levels. Only the 1D z-curve along u is evaluated, all levels
+    being solved at once (see levelsolver). Levels out of range give None
+    (scalar) or nan (array).
+    """
+    zc=np.array(bspline.ctrlpts)[::bspline.ctrlpts_size_v, 2]      # z at v=0
+    zl=np.atleast_1d(np.asarray(z, dtype=float))
+    u=levelsolver(bspline.degree_u, bspline.knotvector_u, zc[None], zl[None], tol, maxiter)[0]
+    if np.isnan(u).any():
         print('error range')
+    if np.ndim(z)==0:
+        return None if np.isnan(u[0]) else float(u[0])
+    return u
+
+#==============================================================================#
+
+def gridfaces(ni, nj, quad=False):
+    """
+    Connectivity of a structured grid of ni x nj points numbered row by row
+    (point (i,j) is i*nj+j), in the pyvista faces layout. Each grid cell gives
+    one quadrangle, or two triangles sharing its diagonal.
+    """
+    a=(np.arange(ni-1)[:,None]*nj+np.arange(nj-1)).ravel()  # lower-left corners
+    if quad:
+        cells=np.stack([a, a+1, a+nj+1, a+nj], axis=1)
+    else:
+        cells=np.stack([a, a+1, a+nj+1, a, a+nj+1, a+nj], axis=1).reshape(-1, 3)
+    return np.hstack([np.full((len(cells), 1), cells.shape[1]), cells]).ravel()
+
+#==============================================================================#
+# Adaptive sampling
+
+def chorddensity(speed, kappa, chord, hmax=None):
+    """
+    Number of chords per unit parameter such that the deviation between a
+    curve and its chords stays below chord: a chord of length l on a curve
+    of curvature kappa deviates by kappa*l**2/8. With hmax, the chords are
+    also shorter than hmax. Extra axes (several curves sampled at the same
+    parameters) are reduced by their max, so that the nodes suit all curves.
+    """
+    g=speed*np.sqrt(kappa/(8.*chord))
+    if hmax is not None:
+        g=np.maximum(g, speed/hmax)
+    return g.reshape(len(g), -1).max(axis=1)
+
+def chordparams(u, g):
+    """
+    Parameters of the nodes, first and last values of u included, such that
+    there is one chord per unit of the integral of the density g (sampled on
+    the fine parameters u).
+    """
+    G=np.concatenate([[0.], np.cumsum(0.5*(g[1:]+g[:-1])*np.diff(u))])
+    if not G[-1]>0.:
+        return u[[0, -1]]
+    n=int(np.ceil(G[-1]-1e-9))
+    return np.interp(np.linspace(0., G[-1], n+1), G, u)
+
+def curveparams(shape, dens, chord=None, hmax=None, nfine=1000):
+    """
+    Parameters of the nodes of a curve: dens uniform parameters, or adaptive
+    ones for the chord deviation chord (see chorddensity).
+    """
+    if chord is None:
+        return np.linspace(0, 1, dens)
+    uf=np.linspace(0., 1., nfine)
+    speed, kappa=curvecurvature(shape.degree, shape.knotvector, shape.ctrlpts, uf)
+    return chordparams(uf, chorddensity(speed, kappa, chord, hmax))
+
+def isoparams(shape, net, lu, chord, hmax=None, nfine=1000):
+    """
+    Adaptive parameters in v of a surface, common to its v-isocurves at the
+    levels lu (one row of the sampling grid per level).
+    """
+    Bu=memobasis(shape.degree_u, tuple(shape.knotvector_u), tuple(lu), len(net))
+    iso=np.einsum('ia,abc->bic', Bu, net)            # control points of isocurves
+    vf=np.linspace(0., 1., nfine)
+    speed, kappa=curvecurvature(shape.degree_v, shape.knotvector_v, iso, vf)
+    return chordparams(vf, chorddensity(speed, kappa, chord, hmax))
+
+def chordlevels(lsurf, chord, hmax=None, nfine=1000, nv=21):
+    """
+    Adaptive z-levels, from 0 to the top of the surfaces, common to all of
+    them so that their meshes still match along shared edges. The density of
+    the u-isocurves (nv of them per surface) is converted to a density in z
+    along the z-curve at v=0, and the max over the surfaces is kept.
+
+    :param lsurf: list of (shape, net), net being the control net (nu, nv, 3)
+    """
+    zf=np.linspace(0., max(net[...,2].max() for shape, net in lsurf), nfine)
+    gz=np.zeros(nfine)
+    uf=np.linspace(0., 1., nfine)
+    for shape, net in lsurf:
+        p, kv=shape.degree_u, np.array(shape.knotvector_u)
+        Bv=memobasis(shape.degree_v, tuple(shape.knotvector_v), tuple(np.linspace(0., 1., nv)), net.shape[1])
+        iso=np.einsum('jb,abc->ajc', Bv, net)            # control points of isocurves
+        speed, kappa=curvecurvature(p, kv, iso, uf)
+        g=chorddensity(speed, kappa, chord, hmax)
+        z=evalcurve(p, kv, net[:,0,2], uf)
+        dz=np.abs(evalcurve(p-1, *derivctrlpts(p, kv, net[:,0,2])[::-1], uf))
+        g=np.where(dz>1e-9, g/np.maximum(dz, 1e-9), 0.)             # per unit z
+        order=np.argsort(z)
+        gz=np.maximum(gz, np.interp(zf, z[order], g[order], left=0., right=0.))
+    return np.around(chordparams(zf, gz), 6)
+
+#==============================================================================#
+
+def surfnet(shape):
+    """
+    Control net of a surface as an array (size_u, size_v, dim).
+    """
+    return np.array(shape.ctrlpts).reshape(shape.ctrlpts_size_u, shape.ctrlpts_size_v, -1)
+
+def shapekey(shape):
+    """
+    Degrees, knot vectors and sizes: shapes with the same key are sampled on
+    the same parameters.
+    """
+    if str(shape)=='curve':
+        return ('curve', shape.degree, tuple(shape.knotvector), shape.ctrlpts_size)
+    return ('surface', shape.degree_u, shape.degree_v, tuple(shape.knotvector_u),
+            tuple(shape.knotvector_v), shape.ctrlpts_size_u, shape.ctrlpts_size_v)
+
+def affinemap(src, dst, tol=1e-9):
+    """
+    Affine map X ((dim+1) x dim) such that dst=[src 1].X for two control nets
+    (rotations, reflections, translations...), or None if there is none.
+    """
+    a=np.hstack([src, np.ones((len(src), 1))])
+    X=np.linalg.lstsq(a, dst, rcond=None)[0]
+    if np.abs(a@X-dst).max()>tol:
         return None
+    return X
 
-    while abs(zsol-z)>1e-10:
-        vsol=0.5*(vmax+vmin)
-        zsol=bspline.evaluate_single([vsol,0])[2]
-        if   zsol>z: vmax=vsol
-        elif zsol<z: vmin=vsol
-        
-    return vsol
+def symmetrygroup(bspline, tol=1e-9):
+    """
+    Symmetries of a container (e.g. the 4 rotations and 3 reflections of the
+    unit cell). For every shape, returns (b, X): the index of a previous base
+    shape and the affine map sending its control points (hence all its points,
+    by partition of unity) onto those of the shape, or (k, None) if the shape
+    is a base itself. Only surfaces are grouped, and they must share their
+    z-coordinates with the base so that they are sampled on the same z-levels
+    (curve points are not rounded, transformed copies would not merge exactly).
+    """
+    group=[]; bases=dict()
+    for k, shape in enumerate(bspline):
+        dst=np.array(shape.ctrlpts)
+        for b in bases.get(shapekey(shape), []) if str(shape)=='surface' else []:
+            src=np.array(bspline[b].ctrlpts)
+            if np.abs(src[:,2]-dst[:,2]).max()>tol:
+                continue
+            X=affinemap(src, dst, tol)
+            if X is not None:
+                group.append((b, X))
+                break
+        else:
+            bases.setdefault(shapekey(shape), []).append(k)
+            group.append((k, None))
+    return group
 
 #==============================================================================#
 
-def bspline2mesh(bspline, dens):
+def bspline2mesh(bspline, dens, mode='delaunay', symmetric=True, tol=1e-6,
+                 chord=None, hmax=None):
+    """
+    Mesh of a b-spline curve or of a container of curves and surfaces, with
+    dens points along the curves and the second coordinate of the surfaces.
+    Surfaces are triangulated according to mode:
+        * 'delaunay': Delaunay triangulation of the evaluated points
+        * 'tri'     : triangles built from the (z-level x dens) sampling grid
+        * 'quad'    : quadrangles built from the (z-level x dens) sampling grid
+    With symmetric, shapes that are affine images of a previous shape (see
+    symmetrygroup) are not meshed again: the mesh of the base shape is copied
+    and its points are transformed. The meshes of the shapes are welded at the
+    end: nodes closer than tol are merged (see meshweld), and with 'tri' or
+    'quad' the faces are oriented outward (see orientcells).
+    With chord, the sampling is adaptive instead of dens points and 0.02 steps
+    in z: nodes are placed where the curvature is high, so that the chords
+    deviate from the b-spline by less than chord (and are shorter than hmax).
+    """
+    if mode not in ('delaunay', 'tri', 'quad'):
+        print('unknown mode', mode)
+        exit(1)
+    import pyvista as pv                       # pyvista is imported when needed
+
     m=pv.PolyData()
     
     if str(bspline)=='container':
-        for shape in bspline:
+        with stage('transform'):
+            group=symmetrygroup(bspline) if symmetric else [(k, None) for k in range(len(bspline))]
+        base=dict()                          # unrounded points and mesh of bases
+        lm=[]                                           # meshes of all shapes
+        lsurf=[(shape, surfnet(shape)) for shape in bspline if str(shape)=='surface']
+        if chord is not None and lsurf:
+            with stage('evaluate'):
+                lzc=chordlevels(lsurf, chord, hmax) # common to all surfaces
+        for k, shape in enumerate(bspline):
 
+    # Case 0 - Image of a base shape
+            b, X=group[k]
+            if X is not None:
+                with stage('transform'):
+                    p, mb=base[b]
+                    mk=mb.copy()
+                    mk.points=np.around(p@X[:-1]+X[-1], decimals=4)
+                lm.append(mk)
 
     # Case I - B-spline curve
-            if str(shape)=='curve':
-                p=shape.evaluate_list(np.linspace(0, 1, dens)) # evaluate points
-                m+=pv.lines_from_points(p)          # generate lines from points	
+            elif str(shape)=='curve':
+                with stage('evaluate'):
+                    p=curvepoints(shape, curveparams(shape, dens, chord, hmax)) # evaluate points
+                with stage('triangulate'):
+                    lm.append(pv.lines_from_points(p))  # generate lines from points	
 
     # Case II - B-spline surface
             elif str(shape)=='surface':
-                p=[]
                 h=shape.bbox[1][2]-shape.bbox[0][2]
-                for pz in range(int(h/0.02)+1):
-                    u=dichotomysolver(shape, round(0.02*pz,6))
-                    coor=np.transpose(np.append([np.linspace(0, 1, dens)], np.full((1, dens),u),axis=0))
-                    coor[:, [1, 0]] = coor[:, [0, 1]]
-                    p.extend(shape.evaluate_list(coor))
-                p=np.around(np.array(p), decimals=4)
-                m+=pv.PolyData(p).delaunay_2d(alpha=0.035)   # Delaunay triangulation
+                if chord is None:
+                    lz=np.around(0.02*np.arange(int(h/0.02)+1), 6)
+                else:
+                    lz=lzc
+                with stage('solve'):
+                    lu=dichotomysolver(shape, lz)            # all levels at once
+                with stage('evaluate'):
+                    v=np.linspace(0, 1, dens) if chord is None else isoparams(shape, surfnet(shape), lu, chord, hmax)
+                    p=surfpoints(shape, lu, v).reshape(-1, 3)  # grid lu x v
+                with stage('triangulate'):
+                    if mode=='delaunay':
+                        mk=pv.PolyData(np.around(p, decimals=4)).delaunay_2d(alpha=0.035)   # Delaunay triangulation
+                    else:
+                        mk=pv.PolyData(np.around(p, decimals=4), gridfaces(len(lz), len(v), mode=='quad'))
+                base[k]=(p, mk)
+                lm.append(mk)
             else:
                 print('oups')
                 exit(1)
+
+        with stage('triangulate'):
+            m=weldmeshes(lm, tol)          # merge nodes shared between shapes
+            if mode!='delaunay' and len(m.faces) and not len(m.lines):
+                p, c=meshcells(m)
+                c=orientcells(p, c)                            # outward normals
+                m.faces=np.hstack([np.full((len(c), 1), c.shape[1]), c]).ravel()
                 
     elif str(bspline)=='curve':
-        p=bspline.evaluate_list(np.linspace(0, 1, dens))       # evaluate points 
-        m=pv.lines_from_points(p)                   # generate lines from points	
+        with stage('evaluate'):
+            p=curvepoints(bspline, curveparams(bspline, dens, chord, hmax)) # evaluate points 
+        with stage('triangulate'):
+            m=pv.lines_from_points(p)               # generate lines from points	
 
+    count('points', m.n_points)
+    count('lines' if len(m.lines) else ('quads' if mode=='quad' else 'triangles'), m.n_cells)
     return m
 
 #==============================================================================#
+
+def familyarrays(bspline, dens, lh, mode='tri', symmetric=True, tol=1e-6,
+                 chord=None, hmax=None, precision='double'):
+    """
+    Node and connectivity arrays of the meshes of bspline2meshfamily.
+    Yields (h, points, cells, number of merged nodes).
+    """
+    if mode not in ('tri', 'quad'):
+        print('unknown mode', mode)
+        exit(1)
+    if precision not in precisions:
+        print('unknown precision', precision)
+        exit(1)
+    ftype, itype=precisions[precision]
+
+    with stage('transform'):
+        group=symmetrygroup(bspline) if symmetric else [(k, None) for k in range(len(bspline))]
+    nets=[]
+    for shape in bspline:
+        net=surfnet(shape)
+        zkey=(net[:,0,2].tobytes(), tuple(shape.knotvector_u))  # z-curve along u
+        nets.append((shape, net, zkey, shape.bbox[0][2], shape.bbox[1][2]))
+
+    v=np.linspace(0, 1, dens)
+    faces=dict()                                      # connectivity per grid size
+    rows=dict()        # u and rows at unit height per z-curve, base and level
+    topo=dict()            # weld map and oriented cells per grid of the patches
+    pflip=None                            # reversed faces, for every patch
+    for h in lh:
+        lp=[]; grids=[]
+        base=dict()       # unrounded points of bases at unit height and nb of v
+        if chord is not None:
+            with stage('evaluate'):
+                lzc=chordlevels([(shape, net*[1, 1, h]) for (shape, net, zkey, zmin, zmax), (b, X)
+                                 in zip(nets, group) if X is None], chord, hmax)
+        for (shape, net, zkey, zmin, zmax), (b, X) in zip(nets, group):
+            lz=np.around(0.02*np.arange(int(h*(zmax-zmin)/0.02)+1), 6) if chord is None else lzc
+            if X is not None:
+                with stage('transform'):
+                    p, nv=base[b]
+                    p=p@X[:-1]+X[-1]
+            elif chord is None:
+                # uniform sampling: only the levels not met at a previous
+                # height are solved and evaluated
+                zu=np.clip(lz/h, zmin, zmax).tolist()
+                lu, lrow=rows.setdefault(zkey, dict()), rows.setdefault(b, dict())
+                new=[z for z in dict.fromkeys(zu) if z not in lrow]
+                if new:
+                    todo=[z for z in new if z not in lu]
+                    if todo:
+                        with stage('solve'):
+                            lu.update(zip(todo, dichotomysolver(shape, todo)))
+                    with stage('evaluate'):
+                        lrow.update(zip(new, evalsurfgrid(shape.degree_u, shape.degree_v, shape.knotvector_u,
+                                                          shape.knotvector_v, net, [lu[z] for z in new], v)))
+                p=np.stack([lrow[z] for z in zu])
+                nv=len(v)
+                base[b]=(p, nv)
+            else:
+                with stage('solve'):
+                    lu=dichotomysolver(shape, np.clip(lz/h, zmin, zmax))
+                with stage('evaluate'):
+                    v=isoparams(shape, net*[1, 1, h], lu, chord, hmax)
+                    p=evalsurfgrid(shape.degree_u, shape.degree_v, shape.knotvector_u,
+                                   shape.knotvector_v, net, lu, v)
+                nv=len(v)
+                base[b]=(p, nv)
+            p=p*np.array([1, 1, h])
+            lp.append(np.around(p.reshape(-1, 3), decimals=4))
+            grids.append((len(lz), nv))
+
+        # single weld of all patches, in double precision, outward normals.
+        # The weld map only depends on the grids of the patches: it is
+        # computed once per grid and checked at the other heights. Nodes
+        # being rounded to 4 decimals, a tol below the rounding step welds
+        # identical nodes only (see roundedmap). The orientation of every
+        # patch is computed at the first height (see orientcells)
+        with stage('triangulate'):
+            pts=np.vstack(lp)
+            key=tuple(grids)
+            if key in topo:
+                newid, first, c=topo[key]
+                if np.abs(pts-pts[first][newid]).max()>tol:
+                    del topo[key]
+            if key not in topo:
+                lf=[]; n=0
+                for k, ((nz, nv), pk) in enumerate(zip(grids, lp)):
+                    if (nz, nv) not in faces:
+                        faces[nz, nv]=gridfaces(nz, nv, mode=='quad').reshape(-1, 5 if mode=='quad' else 4)[:,1:]
+                    f=faces[nz, nv]
+                    if pflip is not None:
+                        f=flipcells(f, np.full(len(f), pflip[k]))
+                    lf.append(f+n)
+                    n+=len(pk)
+                newid, first=roundedmap(pts, 4) if tol<0.5e-4 else weldmap(pts, tol)
+                c=newid[np.vstack(lf)]
+                if pflip is None:
+                    oc=orientcells(pts[first], c)
+                    flipped=(oc!=c).any(axis=1)
+                    starts=np.cumsum([0]+[len(f) for f in lf])
+                    pflip=[flipped[i:j].any() for i, j in zip(starts[:-1], starts[1:])]
+                    c=oc
+                topo[key]=(newid, first, c)
+            p, nmerged=pts[first], len(pts)-len(first)
+        count('points', len(p))
+        count('quads' if mode=='quad' else 'triangles', len(c))
+        yield h, p.astype(ftype, copy=False), c.astype(itype, copy=False), nmerged
+
+def bspline2arrays(bspline, dens, lh, mode='tri', symmetric=True, tol=1e-6,
+                   chord=None, hmax=None, precision='double'):
+    """
+    Meshes of bspline2meshfamily as node and connectivity (ncells x k)
+    arrays, to be tiled (see mesh2panel) and exported (see mesh2file)
+    without pyvista. With precision 'single', the points are float32 and
+    the cells int32, which halves the memory of large panels; the nodes are
+    still computed and welded in double precision. Yields (h, points, cells).
+    """
+    for h, p, c, nmerged in familyarrays(bspline, dens, lh, mode, symmetric, tol,
+                                         chord, hmax, precision):
+        yield h, p, c
+
+def bspline2meshfamily(bspline, dens, lh, mode='tri', symmetric=True, tol=1e-6,
+                       chord=None, hmax=None):
+    """
+    Meshes of a container of surfaces for every height h of lh, the z
+    coordinate of the surfaces being scaled by h as in the shell mesh
+    generators. The control nets are read once, the surfaces are evaluated
+    at unit height with memoized basis functions and scaled in z, and the
+    grid connectivity is shared between heights, so that a sweep over lh
+    costs little more than a single height. With symmetric, only the base
+    surfaces of the symmetry group are evaluated and nodes closer than tol
+    are welded (see bspline2mesh). With chord, the sampling is adaptive (see
+    bspline2mesh), the z-levels and v-parameters being computed for every h;
+    otherwise only the levels not met at a previous height are solved and
+    evaluated, and the weld map is computed once per grid of the patches.
+    The faces of mirrored patches are reversed so that the normals of the
+    shell elements agree and point outward, the orientation of every patch
+    being computed at the first height (see orientcells). Yields (h, mesh).
+    """
+    for h, p, c, nmerged in familyarrays(bspline, dens, lh, mode, symmetric, tol,
+                                         chord, hmax):
+        m=arrays2polydata(p, c)
+        m.field_data['merged']=[nmerged]
+        yield h, m
+
+#==============================================================================#
@@ -0,0 +1,357 @@
+# -*- coding: utf-8 -*-
+
+#==============================================================================#
+# Author(s)  : Filippo AGNELLI (LMS / X / CNRS)                                #
+#              e-mail: filippo.agnelli@polytechnique.edu                       #
+#==============================================================================#
+# Description: Vectorized b-spline basis functions. The non-zero basis         #
+#              functions of a whole array of parameters are evaluated in one   #
+#              Cox-de Boor pass (Algorithm A2.2 of The NURBS Book) with numpy, #
+#              instead of one geomdl call per parameter and basis function.    #
+#              Curves and surfaces are evaluated with their derivatives as     #
+#              B.P and Bu.P.Bv^T. Closest points and curvature are vectorized. #
+#==============================================================================#
+# Version    : v.2026-10-17 .......................................... pass    #
+#==============================================================================#
+# Risks      : knot vectors are assumed clamped and non-decreasing             #
+#==============================================================================#
+
+from functools import lru_cache
+from math import comb
+
+import numpy as np
+try:
+    import numba                          # optional: JIT kernel of basisfuns
+except ImportError:
+    numba=None
+
+from instrument import count
+
+def findspan(degree, kv, u):
+    """
+    Knot span index of every parameter of u (Algorithm A2.1, vectorized).
+    The last span is returned for u=kv[-1], as in geomdl.
+    """
+    kv=np.asarray(kv, dtype=float)
+    n=len(kv)-degree-2                            # index of last control point
+    span=np.searchsorted(kv, u, side='right')-1
+    return np.clip(span, degree, n)
+
+def basisloop(degree, kv, u, span):
+    """
+    Non-zero basis functions, one parameter after the other (Algorithm A2.2
+    as written), the kernel compiled by numba when it is installed.
+    """
+    N=np.zeros((u.size, degree+1))
+    left=np.zeros(degree+1)
+    right=np.zeros(degree+1)
+    for k in range(u.size):
+        N[k,0]=1.
+        for j in range(1, degree+1):
+            left[j]=u[k]-kv[span[k]+1-j]
+            right[j]=kv[span[k]+j]-u[k]
+            saved=0.
+            for r in range(j):
+                temp=N[k,r]/(right[r+1]+left[j-r])
+                N[k,r]=saved+right[r+1]*temp
+                saved=left[j-r]*temp
+            N[k,j]=saved
+    return N
+
+if numba is not None:
+    basisloop=numba.njit(cache=True)(basisloop)
+
+def basisfuns(degree, kv, u):
+    """
+    Non-zero basis functions for an array of parameters, all at once with
+    numpy, or with the compiled basisloop if numba is installed.
+
+    :return: spans (m,) and basis values (m, degree+1), N[k,a] being the value
+             of the basis function of index spans[k]-degree+a at u[k]
+    """
+    kv=np.asarray(kv, dtype=float)
+    u=np.atleast_1d(np.asarray(u, dtype=float))
+    span=findspan(degree, kv, u)
+    if numba is not None:
+        return span, basisloop(degree, kv, u.ravel(), span.ravel()).reshape(u.shape+(degree+1,))
+
+    N=np.zeros((u.size, degree+1)); N[:,0]=1.
+    left=np.zeros((u.size, degree+1))
+    right=np.zeros((u.size, degree+1))
+    for j in range(1, degree+1):
+        left[:,j]=u-kv[span+1-j]
+        right[:,j]=kv[span+j]-u
+        saved=np.zeros(u.size)
+        for r in range(j):
+            temp=N[:,r]/(right[:,r+1]+left[:,j-r])
+            N[:,r]=saved+right[:,r+1]*temp
+            saved=left[:,j-r]*temp
+        N[:,j]=saved
+
+    return span, N
+
+def basismatrix(degree, kv, u, num_cpts):
+    """
+    Sparse collocation matrix B (m x num_cpts), B[k,i]=N_i,p(u[k]), such that
+    B.dot(ctrlpts) evaluates a b-spline curve at every parameter of u.
+    """
+    from scipy import sparse                     # scipy is imported when needed
+    span, N=basisfuns(degree, kv, u)
+    rows=np.repeat(np.arange(span.size), degree+1)
+    cols=(span[:,None]-degree+np.arange(degree+1)).ravel()
+    return sparse.csr_matrix((N.ravel(), (rows, cols)), shape=(span.size, num_cpts))
+
+@lru_cache(maxsize=1024)
+def memobasis(degree, kv, u, num_cpts):
+    """
+    Dense collocation matrix (see basismatrix), memoized on the degree, the
+    knot vector and the parameters, which must be given as tuples. The
+    returned array is shared between calls and therefore read-only.
+    """
+    B=basismatrix(degree, kv, u, num_cpts).toarray()
+    B.flags.writeable=False
+    return B
+
+def evalsurfgrid(degree_u, degree_v, kv_u, kv_v, ctrlpts, u, v):
+    """
+    Points of a b-spline surface on the grid u x v, as Bu.P.Bv^T with memoized
+    basis matrices. ctrlpts is the (size_u, size_v, dim) control net.
+
+    :return: array (len(u), len(v), dim)
+    """
+    nu, nv=ctrlpts.shape[:2]
+    count('evaluations', len(u)*len(v))
+    Bu=memobasis(degree_u, tuple(kv_u), tuple(u), nu)
+    Bv=memobasis(degree_v, tuple(kv_v), tuple(v), nv)
+    return np.einsum('ia,abc,jb->ijc', Bu, ctrlpts, Bv)
+
+def evalcurve(degree, kv, ctrlpts, u):
+    """
+    Points of a b-spline curve (control points of any dimension, or scalars)
+    at every parameter of u.
+    """
+    ctrlpts=np.asarray(ctrlpts, dtype=float)
+    span, N=basisfuns(degree, kv, u)
+    count('evaluations', span.size)
+    idx=span[:,None]-degree+np.arange(degree+1)
+    return np.einsum('ka,ka...->k...', N, ctrlpts[idx])
+
+def evalrows(degree, kv, ctrlpts, u):
+    """
+    Points of many b-spline curves of the same knot vector, each one at its
+    own parameters: ctrlpts (m, num_cpts, ...) and u (m, n).
+
+    :return: array (m, n, ...)
+    """
+    ctrlpts=np.asarray(ctrlpts, dtype=float)
+    u=np.asarray(u, dtype=float)
+    span, N=basisfuns(degree, kv, u.ravel())
+    count('evaluations', span.size)
+    idx=span[:,None]-degree+np.arange(degree+1)
+    rows=np.repeat(np.arange(u.shape[0]), u.shape[1])[:,None]
+    pts=np.einsum('ka,ka...->k...', N, ctrlpts[rows, idx])
+    return pts.reshape(u.shape+ctrlpts.shape[2:])
+
+def derivctrlpts(degree, kv, ctrlpts):
+    """
+    Control points and knot vector of the first derivative of a b-spline
+    curve, which is of degree-1 (Eqn 3.8 of The NURBS Book).
+    """
+    kv=np.asarray(kv, dtype=float)
+    ctrlpts=np.asarray(ctrlpts, dtype=float)
+    n=len(ctrlpts)
+    den=(kv[degree+1:degree+n]-kv[1:n]).reshape((-1,)+(1,)*(ctrlpts.ndim-1))
+    return degree*np.diff(ctrlpts, axis=0)/den, kv[1:-1]
+
+#==============================================================================#
+# Evaluation with derivatives
+
+def dersmatrices(degree, kv, u, num_cpts, order=0):
+    """
+    Sparse collocation matrices of the basis functions and of their
+    derivatives up to order, [B, B', B'', ...] (m x num_cpts each). The k-th
+    derivative is B_(p-k).D_k...D_1, D_k mapping the control points to those
+    of the k-th derivative (see derivctrlpts).
+    """
+    from scipy import sparse
+    kv=np.asarray(kv, dtype=float)
+    lB=[basismatrix(degree, kv, u, num_cpts)]
+    D=sparse.identity(num_cpts, format='csr')
+    p, kvk, n=degree, kv, num_cpts
+    for k in range(order):
+        if p==0:
+            lB.append(sparse.csr_matrix(lB[0].shape))
+            continue
+        dk, kvk=derivctrlpts(p, kvk, np.eye(n))
+        D=sparse.csr_matrix(dk)@D
+        p-=1; n-=1
+        lB.append(basismatrix(p, kvk, u, n)@D)
+    return lB
+
+@lru_cache(maxsize=1024)
+def memoders(degree, kv, u, num_cpts, order=0):
+    """
+    Dense matrices of dersmatrices, memoized as memobasis (tuples in, read-only
+    arrays out).
+    """
+    lB=[B.toarray() for B in dersmatrices(degree, kv, u, num_cpts, order)]
+    for B in lB:
+        B.flags.writeable=False
+    return tuple(lB)
+
+def rationalders(A, W):
+    """
+    Derivatives of a NURBS curve from those of its weighted points A and of
+    its weight W, [A, A', ...] and [W, W', ...] (Algorithm A4.2).
+    """
+    C=np.zeros_like(A)
+    for k in range(len(A)):
+        a=A[k]-sum(comb(k, i)*W[i][...,None]*C[k-i] for i in range(1, k+1))
+        C[k]=a/W[0][...,None]
+    return C
+
+def evalcurveders(degree, kv, ctrlpts, u, order=0, weights=None):
+    """
+    Points and derivatives up to order of a b-spline curve, or of a NURBS
+    curve with weights, at every parameter of u (B.P with memoized basis
+    matrices).
+
+    :return: array (order+1, len(u), dim), [C, C', C'', ...]
+    """
+    P=np.asarray(ctrlpts, dtype=float)
+    lB=memoders(degree, tuple(kv), tuple(u), len(P), order)
+    count('evaluations', len(u))
+    if weights is None:
+        return np.stack([B@P for B in lB])
+    w=np.asarray(weights, dtype=float)
+    return rationalders(np.stack([B@(w[:,None]*P) for B in lB]), np.stack([B@w for B in lB]))
+
+def evalsurfders(degree_u, degree_v, kv_u, kv_v, ctrlpts, u, v, order=0, weights=None):
+    """
+    Points and derivatives up to order of a b-spline surface (NURBS with
+    weights, (size_u, size_v)) on the grid u x v, as Bu^(k).P.Bv^(l)^T with
+    memoized basis matrices. ctrlpts is the (size_u, size_v, dim) control net.
+
+    :return: array (order+1, order+1, len(u), len(v), dim), S[k,l] being the
+             derivative k times in u and l times in v (zero for k+l>order)
+    """
+    P=np.asarray(ctrlpts, dtype=float)
+    nu, nv=P.shape[:2]
+    lBu=memoders(degree_u, tuple(kv_u), tuple(u), nu, order)
+    lBv=memoders(degree_v, tuple(kv_v), tuple(v), nv, order)
+    count('evaluations', len(u)*len(v))
+    if weights is not None:
+        w=np.asarray(weights, dtype=float).reshape(nu, nv, 1)
+        P=np.concatenate([w*P, w], axis=-1)                         # homogeneous
+    S=np.zeros((order+1, order+1, len(u), len(v), P.shape[-1]))
+    for k in range(order+1):
+        for l in range(order+1-k):
+            S[k,l]=np.einsum('ia,abc,jb->ijc', lBu[k], P, lBv[l])
+    if weights is None:
+        return S
+
+    A, W=S[...,:-1], S[...,-1:]                                   # Algorithm A4.4
+    SKL=np.zeros_like(A)
+    for k in range(order+1):
+        for l in range(order+1-k):
+            a=A[k,l]-sum(comb(l, j)*W[0,j]*SKL[k,l-j] for j in range(1, l+1))
+            for i in range(1, k+1):
+                a=a-comb(k, i)*(W[i,0]*SKL[k-i,l]+sum(comb(l, j)*W[i,j]*SKL[k-i,l-j]
+                                                      for j in range(1, l+1)))
+            SKL[k,l]=a/W[0,0]
+    return SKL
+
+def shapeweights(shape):
+    """
+    Weights of a geomdl shape, None if it is not rational or all are 1.
+    """
+    w=getattr(shape, 'weights', None) if getattr(shape, 'rational', False) else None
+    return None if w is None or np.all(np.asarray(w)==1.) else w
+
+def curvepoints(shape, u=None, order=0):
+    """
+    Points of a geomdl curve at the parameters u (default: the sample_size
+    parameters of evalpts), replacing evaluate_list and evalpts. With order,
+    derivatives up to order as evalcurveders.
+
+    :return: array (len(u), dim), or (order+1, len(u), dim) if order
+    """
+    u=np.linspace(0., 1., shape.sample_size) if u is None else u
+    C=evalcurveders(shape.degree, shape.knotvector, shape.ctrlpts, u, order, shapeweights(shape))
+    return C if order else C[0]
+
+def surfpoints(shape, u=None, v=None, order=0):
+    """
+    Points of a geomdl surface on the grid u x v (default: the sample_size
+    parameters of evalpts, evalpts being the flattened grid). With order,
+    derivatives up to order as evalsurfders.
+
+    :return: array (len(u), len(v), dim), or as evalsurfders if order
+    """
+    u=np.linspace(0., 1., shape.sample_size_u) if u is None else u
+    v=np.linspace(0., 1., shape.sample_size_v) if v is None else v
+    net=np.array(shape.ctrlpts).reshape(shape.ctrlpts_size_u, shape.ctrlpts_size_v, -1)
+    S=evalsurfders(shape.degree_u, shape.degree_v, shape.knotvector_u, shape.knotvector_v,
+                   net, u, v, order, shapeweights(shape))
+    return S if order else S[0,0]
+
+#==============================================================================#
+# Geometric queries
+
+def curvecurvature(degree, kv, ctrlpts, u):
+    """
+    Speed |C'| and curvature |C' x C''|/|C'|^3 of a b-spline curve at every
+    parameter of u. The last axis of ctrlpts holds the coordinates, other
+    axes give several curves of the same knot vector at once.
+
+    :return: speed and curvature, arrays (len(u), ...)
+    """
+    d1, kv1=derivctrlpts(degree, kv, ctrlpts)
+    d2, kv2=derivctrlpts(degree-1, kv1, d1) if degree>1 else (0.*d1, kv1)
+    c1=evalcurve(degree-1, kv1, d1, u)
+    c2=evalcurve(max(degree-2, 0), kv2, d2, u)
+    s2=(c1*c1).sum(axis=-1)
+    cross2=np.maximum(s2*(c2*c2).sum(axis=-1)-(c1*c2).sum(axis=-1)**2, 0.)   # Lagrange
+    speed=np.sqrt(s2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        kappa=np.where(speed>0., np.sqrt(cross2)/speed**3, 0.)
+    return speed, kappa
+
+def footparams(degree, kv, ctrlpts, cloud, nsample=200):
+    """
+    Parameter of the closest of nsample points evenly spaced in parameter on
+    the curve, for every point of the cloud (KD-tree query). The sampling
+    basis is memoized, so that it is computed once for many curves.
+    """
+    from scipy.spatial import cKDTree
+    us=np.linspace(kv[degree], kv[-degree-1], nsample)
+    B=memobasis(degree, tuple(kv), tuple(us), len(ctrlpts))
+    _, k=cKDTree(B@np.asarray(ctrlpts, dtype=float)).query(cloud)
+    return us[k]
+
+def projectcloud(degree, kv, ctrlpts, cloud, t=None, maxiter=20, tol=1e-12):
+    """
+    Parameters of the closest points of the curve to every point of the
+    cloud, by Newton iterations on (C(t)-Q).C'(t)=0 for all points at once
+    (Section 6.1 of The NURBS Book), started from t or from footparams.
+
+    :return: parameters (n,), clipped to the curve domain
+    """
+    ctrlpts=np.asarray(ctrlpts, dtype=float)
+    kv=np.asarray(kv, dtype=float)
+    t=footparams(degree, kv, ctrlpts, cloud) if t is None else np.array(t, dtype=float)
+    d1, kv1=derivctrlpts(degree, kv, ctrlpts)
+    d2, kv2=derivctrlpts(degree-1, kv1, d1) if degree>1 else (0.*d1, kv1)
+    for it in range(maxiter):
+        r=evalcurve(degree, kv, ctrlpts, t)-cloud
+        c1=evalcurve(degree-1, kv1, d1, t)
+        c2=evalcurve(max(degree-2, 0), kv2, d2, t)
+        den=(c1*c1).sum(axis=1)+(r*c2).sum(axis=1)
+        den=np.where(den>0., den, (c1*c1).sum(axis=1))   # gradient step if concave
+        tn=np.clip(t-(r*c1).sum(axis=1)/den, kv[degree], kv[-degree-1])
+        t, step=tn, np.abs(tn-t).max()
+        if step<tol:
+            break
+    return t
+
+#==============================================================================#
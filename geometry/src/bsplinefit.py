@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+
+#==============================================================================#
+# Author(s)  : Filippo AGNELLI (LMS / X / CNRS)                                #
+#              e-mail: filippo.agnelli@polytechnique.edu                       #
+#==============================================================================#
+# Description: Least-squares b-spline curve fitting with fixed end control     #
+#              points (Section 9.4.1 of The NURBS Book). The collocation       #
+#              matrix is sparse, the normal matrix is banded and it is solved  #
+#              by a banded Cholesky factorization (LAPACK).                    #
+#==============================================================================#
+# Version    : v.2026-10-17 .......................................... pass    #
+#==============================================================================#
+# Risks      : the cloud is assumed ordered along the curve (see tracecloud)   #
+#==============================================================================#
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from bsplinebasis import basismatrix
+
+def paramscurve(cloud, centripetal=False):
+    """
+    Chord length (or centripetal) parameters of the data points, Eqn 9.4-9.6.
+    Same values as geomdl fitting.compute_params_curve.
+    """
+    cds=np.linalg.norm(np.diff(cloud, axis=0), axis=1)
+    if centripetal:
+        cds=np.sqrt(cds)
+    uk=np.concatenate(([0.], np.cumsum(cds)))
+    return uk/uk[-1]
+
+def knotvector2(degree, num_dpts, num_cpts, uk):
+    """
+    Knot vector with at least one parameter per knot span, Eqn 9.68-9.69.
+    Same values as geomdl fitting.compute_knot_vector2.
+    """
+    d=float(num_dpts)/float(num_cpts-degree)
+    jd=np.arange(1, num_cpts-degree)*d
+    i=jd.astype(int)
+    alpha=jd-i
+    kv=(1.-alpha)*uk[i-1]+alpha*uk[i]
+    return np.concatenate((np.zeros(degree+1), kv, np.ones(degree+1)))
+
+def normalbands(nmat, bw):
+    """
+    Upper banded storage of N^T N, in the layout of scipy.linalg.cholesky_banded.
+    """
+    ntn=(nmat.T@nmat).tocoo()
+    up=ntn.row<=ntn.col
+    ab=np.zeros((bw+1, ntn.shape[0]))
+    ab[bw+ntn.row[up]-ntn.col[up], ntn.col[up]]=ntn.data[up]
+    return ab
+
+def fitsystem(cloud, degree, num_cpts, centripetal=False, uk=None):
+    """
+    Parameters, knot vector, interior collocation matrix and the factorized
+    normal matrix of the fit of cloud.
+    """
+    from scipy.linalg import cholesky_banded     # scipy is imported when needed
+    if uk is None:
+        uk=paramscurve(cloud, centripetal)
+    kv=knotvector2(degree, len(cloud), num_cpts, uk)
+    nmat=basismatrix(degree, kv, uk[1:-1], num_cpts).tocsc()
+    cb=cholesky_banded(normalbands(nmat[:,1:-1], degree))
+    return uk, kv, nmat, cb
+
+def fitsolve(cloud, nmat, cb):
+    """
+    Interior control points for a factorized system (see fitsystem).
+    """
+    from scipy.linalg import cho_solve_banded
+    # Compute Rk - Eqn 9.63
+    rk=(cloud[1:-1]-nmat[:,[0]].toarray()*cloud[0]
+                   -nmat[:,[-1]].toarray()*cloud[-1])
+    # Compute R - Eqn 9.67 and solve
+    return cho_solve_banded((cb, False), nmat[:,1:-1].T@rk)
+
+def bSplineFit(cloud, degree, num_cpts, pi, po, centripetal=False):
+    """
+    Control points of the b-spline of given degree and number of control
+    points that best fit the cloud, the first and last control points being
+    fixed to pi and po.
+    """
+    cloud=np.asarray(cloud, dtype=float)
+    uk, kv, nmat, cb=fitsystem(cloud, degree, num_cpts, centripetal)
+    x=fitsolve(cloud, nmat, cb)
+    return [pi]+x.tolist()+[po]
+
+def fitgroup(clouds, uk, degree, num_cpts, pi, po):
+    """
+    Fit of several clouds sharing the same parameters: the normal matrix is
+    factorized once and all clouds are solved as columns of one right-hand side.
+    """
+    dim=clouds[0].shape[1]
+    uk, kv, nmat, cb=fitsystem(clouds[0], degree, num_cpts, uk=uk)
+    x=fitsolve(np.hstack(clouds) if len(clouds)>1 else clouds[0], nmat, cb)
+    return [[pi]+x[:,k*dim:(k+1)*dim].tolist()+[po] for k in range(len(clouds))]
+
+def bSplineFitBatch(clouds, degree, num_cpts, pi, po, centripetal=False, workers=None):
+    """
+    Fit of a list of clouds (of any lengths) with shared degree, number of
+    control points and end points. Clouds with coinciding parameters share one
+    factorization, the remaining independent problems are distributed over a
+    process pool of workers processes (all cores by default, 1 to stay serial).
+
+    :return: list of control points, in the order of clouds
+    """
+    clouds=[np.asarray(c, dtype=float) for c in clouds]
+
+    # group the clouds by parameterization
+    groups=dict()
+    for k, cloud in enumerate(clouds):
+        uk=paramscurve(cloud, centripetal)
+        groups.setdefault(uk.tobytes(), (uk, []))[1].append(k)
+
+    args=[([clouds[k] for k in ks], uk, degree, num_cpts, pi, po)
+          for uk, ks in groups.values()]
+
+    workers=workers or os.cpu_count()
+    if workers>1 and len(args)>1:
+        workers=min(workers, len(args))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            res=list(pool.map(fitgroup, *zip(*args),
+                              chunksize=max(1, len(args)//(4*workers))))
+    else:
+        res=[fitgroup(*a) for a in args]
+
+    ctrlpts=[None]*len(clouds)
+    for (uk, ks), cps in zip(groups.values(), res):
+        for k, cp in zip(ks, cps):
+            ctrlpts[k]=cp
+    return ctrlpts
+
+#==============================================================================#
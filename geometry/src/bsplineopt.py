@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+
+#==============================================================================#
+# Author(s)  : Filippo AGNELLI (LMS / X / CNRS)                                #
+#              e-mail: filippo.agnelli@polytechnique.edu                       #
+#==============================================================================#
+# Description: Optimization of the interior control points of a b-spline, the  #
+#              end points being fixed, minimizing the distance from a cloud to #
+#              the curve. The closest points are projected again at every      #
+#              step (variable projection); residuals and Jacobian are computed #
+#              for all points at once. Multiple starts run in parallel.        #
+#==============================================================================#
+# Version    : v.2026-10-17 .......................................... pass    #
+#==============================================================================#
+# Risks      : uniform clamped knot vector, as generate_knot_vector            #
+#==============================================================================#
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from bsplinebasis import basismatrix, derivctrlpts, evalcurve, projectcloud
+from bsplinefit import bSplineFit, bSplineFitBatch
+
+def knotvectoruniform(degree, num_cpts):
+    """
+    Clamped uniform knot vector, same values as utilities.generate_knot_vector.
+    """
+    return np.concatenate((np.zeros(degree), np.linspace(0., 1., num_cpts-degree+1),
+                           np.ones(degree)))
+
+def unpack(x, pi, po, dim):
+    """
+    Control points of the unknowns x (interior control points), end points
+    included.
+    """
+    return np.vstack([pi, np.reshape(x, (-1, dim)), po])
+
+def footpoints(x, cloud, degree, kv, pi, po, state):
+    """
+    Parameters of the closest points of the curve of x, warm-started from
+    the previous ones, which are kept in state with their x.
+    """
+    if state.get('x') is None or not np.array_equal(state['x'], x):
+        state['t']=projectcloud(degree, kv, unpack(x, pi, po, cloud.shape[1]), cloud, state.get('t'))
+        state['x']=np.array(x)
+    return state['t']
+
+def residuals(x, cloud, degree, kv, pi, po, state):
+    """
+    Vectors C(t_k)-Q_k from every point Q_k of the cloud to its closest point
+    on the curve.
+    """
+    t=footpoints(x, cloud, degree, kv, pi, po, state)
+    return (evalcurve(degree, kv, unpack(x, pi, po, cloud.shape[1]), t)-cloud).ravel()
+
+def jacobian(x, cloud, degree, kv, pi, po, state):
+    """
+    Jacobian of the residuals with respect to the interior control points,
+    the closest points moving with the curve: differentiating
+    (C(t_k)-Q_k).C'(t_k)=0 gives the derivative of t_k (zero at the ends).
+    """
+    (n, dim), ncp=cloud.shape, len(x)//cloud.shape[1]+2
+    P=unpack(x, pi, po, dim)
+    t=footpoints(x, cloud, degree, kv, pi, po, state)
+    N=basismatrix(degree, kv, t, ncp).toarray()                 # N_i(t_k)
+    d1, kv1=derivctrlpts(degree, kv, np.eye(ncp))
+    N1=evalcurve(degree-1, kv1, d1, t)                         # N'_i(t_k)
+    d2, kv2=derivctrlpts(degree-1, kv1, d1) if degree>1 else (0.*d1, kv1)
+    N2=evalcurve(max(degree-2, 0), kv2, d2, t)                # N''_i(t_k)
+    r, c1, c2=N@P-cloud, N1@P, N2@P
+    den=(c1*c1).sum(axis=1)+(r*c2).sum(axis=1)
+    free=(t>kv[degree])&(t<kv[-degree-1])&(den>0.)
+    dt=-(N[:,:,None]*c1[:,None,:]+N1[:,:,None]*r[:,None,:])  # dt_k/dP_id (k,i,d)
+    dt*=np.where(free, 1./np.where(free, den, 1.), 0.)[:,None,None]
+    J=c1[:,:,None,None]*dt[:,None,:,:]+N[:,None,:,None]*np.eye(dim)[None,:,None,:]
+    return J[:,:,1:-1,:].reshape(n*dim, (ncp-2)*dim)
+
+def optimizestart(cloud, degree, num_cpts, pi, po, ctrlpts):
+    """
+    Local optimization (Levenberg-Marquardt) of the interior control points
+    from ctrlpts, the closest points being updated at every evaluation
+    (variable projection).
+
+    :return: control points (list) and rms distance
+    """
+    from scipy.optimize import least_squares     # scipy is imported when needed
+    kv=knotvectoruniform(degree, num_cpts)
+    state=dict()
+    x0=np.asarray(ctrlpts, dtype=float)[1:-1].ravel()
+    res=least_squares(residuals, x0, jac=jacobian, method='lm',
+                      args=(cloud, degree, kv, pi, po, state))
+    rms=np.sqrt(2.*res.cost/len(cloud))
+    return unpack(res.x, pi, po, cloud.shape[1]).tolist(), rms
+
+def optimizectrlpts(cloud, degree, num_cpts, pi, po, starts=(), nstarts=8,
+                    spread=0.02, seed=0, workers=None, fit=None):
+    """
+    Control points of the b-spline of given degree and number of control
+    points closest to the cloud (ordered along the curve), the first and last
+    control points being fixed to pi and po. The local optimization is run
+    from the least-squares fit (bSplineFit, unless given as fit), from
+    nstarts-1 random perturbations of its interior points (normal, of
+    deviation spread) and from the given starts, over a process pool of
+    workers processes (all cores by default, 1 to stay serial).
+
+    :return: control points and rms distance of the best start
+    """
+    cloud=np.asarray(cloud, dtype=float)
+    if fit is None:
+        fit=bSplineFit(cloud, degree, num_cpts, pi, po)
+    fit=np.array(fit, dtype=float)
+    rng=np.random.default_rng(seed)
+    lstart=[fit]
+    for k in range(nstarts-1):
+        p=fit.copy()
+        p[1:-1]+=rng.normal(scale=spread, size=p[1:-1].shape)
+        lstart.append(p)
+    lstart+=[np.asarray(s, dtype=float) for s in starts]
+
+    args=[(cloud, degree, num_cpts, pi, po, s) for s in lstart]
+    workers=workers or os.cpu_count()
+    if workers>1 and len(args)>1:
+        workers=min(workers, len(args))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            res=list(pool.map(optimizestart, *zip(*args),
+                              chunksize=max(1, len(args)//(4*workers))))
+    else:
+        res=[optimizestart(*a) for a in args]
+    return min(res, key=lambda r: r[1])
+
+def optimizebatch(clouds, degree, num_cpts, pi, po, starts=None, **kwargs):
+    """
+    Optimized control points of a list of clouds (see optimizectrlpts) with
+    shared degree, number of control points and end points, the
+    least-squares starts of all clouds being fitted in one call (see
+    bSplineFitBatch).
+
+    :param starts: list of extra starts of every cloud, or None
+    :return: list of (control points, rms distance), in the order of clouds
+    """
+    fits=bSplineFitBatch(clouds, degree, num_cpts, pi, po, workers=kwargs.get('workers'))
+    return [optimizectrlpts(cloud, degree, num_cpts, pi, po, fit=fit,
+                            starts=() if starts is None else starts[k], **kwargs)
+            for k, (cloud, fit) in enumerate(zip(clouds, fits))]
+
+#==============================================================================#
@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+
+#==============================================================================#
+# Author(s)  : Filippo AGNELLI (LMS / X / CNRS)                                #
+#              e-mail: filippo.agnelli@polytechnique.edu                       #
+#==============================================================================#
+# Description: Binary store of b-splines and meshes as uncompressed .npz:      #
+#              control points, weights, knot vectors and degrees of all shapes #
+#              are concatenated in a few arrays, meshes are stored as node and #
+#              connectivity arrays. Arrays are memory-mapped from the file     #
+#              (zero-copy views). geomdl JSON remains the interchange format:  #
+#              the .npz next to a .json is built from it, and rebuilt when the #
+#              content hash of the .json stored in the .npz no longer matches. #
+#==============================================================================#
+# Version    : v.2026-10-17 .......................................... pass    #
+#==============================================================================#
+# Risks      : trim curves, names and ids of geomdl shapes are not stored      #
+#==============================================================================#
+
+import hashlib
+import json
+import os
+import struct
+import zipfile
+import numpy as np
+
+#==============================================================================#
+# npz files
+
+def npzviews(ifile):
+    """
+    Arrays of an uncompressed .npz as read-only memory maps of the file,
+    without reading the data (arrays of size 0 are plain empty arrays).
+
+    :return: dict {name: array}
+    """
+    views=dict()
+    with zipfile.ZipFile(ifile) as z, open(ifile, 'rb') as f:
+        for info in z.infolist():
+            if info.compress_type!=zipfile.ZIP_STORED:
+                print('compressed npz cannot be memory-mapped:', ifile)
+                exit(1)
+            f.seek(info.header_offset+26)                     # local file header
+            n, m=struct.unpack('<HH', f.read(4))
+            f.seek(info.header_offset+30+n+m)
+            version=np.lib.format.read_magic(f)
+            if version==(1, 0):
+                shape, fortran, dtype=np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran, dtype=np.lib.format.read_array_header_2_0(f)
+            name=info.filename[:-4]
+            if np.prod(shape)==0:
+                views[name]=np.empty(shape, dtype=dtype)
+            else:
+                views[name]=np.memmap(ifile, dtype=dtype, mode='r', offset=f.tell(),
+                                      shape=shape, order='F' if fortran else 'C')
+    return views
+
+def filehash(ifile):
+    """
+    sha1 of the content of a file (hex).
+    """
+    with open(ifile, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+#==============================================================================#
+# b-splines
+
+def dict2arrays(data):
+    """
+    Arrays of a geomdl dict ({'shape': {'type', 'count', 'data'}}), shapes
+    being concatenated.
+    """
+    pdim={'curve':1, 'surface':2}[data['shape']['type']]
+    kk=['knotvector'] if pdim==1 else ['knotvector_u', 'knotvector_v']
+    dd=['degree'] if pdim==1 else ['degree_u', 'degree_v']
+    ld=data['shape']['data']
+    for d in ld:
+        if d['type']!='spline' or 'trims' in d or 'reversed' in d:
+            print('only untrimmed splines can be stored')
+            exit(1)
+    return dict(pdim=np.array(pdim),
+                rational=np.array([d['rational'] for d in ld]),
+                degree=np.array([[d[k] for k in dd] for d in ld], dtype=np.int64).reshape(-1, pdim),
+                size=np.array([[len(d['control_points']['points'])] if pdim==1 else
+                               [d['size_u'], d['size_v']] for d in ld], dtype=np.int64).reshape(-1, pdim),
+                kvsize=np.array([[len(d[k]) for k in kk] for d in ld], dtype=np.int64).reshape(-1, pdim),
+                knotvector=np.array([x for d in ld for k in kk for x in d[k]], dtype=float),
+                ctrlpts=np.array([p for d in ld for p in d['control_points']['points']], dtype=float),
+                weights=np.array([w for d in ld for w in d['control_points'].get('weights',
+                                  [1.]*len(d['control_points']['points']))], dtype=float),
+                delta=np.array([np.ravel(d['delta']) for d in ld], dtype=float).reshape(-1, pdim))
+
+def arrays2shapes(arr):
+    """
+    Shapes of the arrays of a store: one dict per shape with its degree,
+    size, knotvector (one array per parametric direction), ctrlpts (n x dim)
+    and weights, all being views of the store arrays.
+    """
+    pdim=int(arr['pdim'])
+    npts=np.prod(arr['size'], axis=1)
+    ip=np.concatenate([[0], np.cumsum(npts)])
+    ik=np.concatenate([[0], np.cumsum(arr['kvsize'])])
+    shapes=[]
+    for k in range(len(npts)):
+        shapes.append(dict(pdim=pdim, rational=bool(arr['rational'][k]),
+                           degree=arr['degree'][k].tolist(), size=arr['size'][k].tolist(),
+                           knotvector=[arr['knotvector'][ik[k*pdim+i]:ik[k*pdim+i+1]] for i in range(pdim)],
+                           ctrlpts=arr['ctrlpts'][ip[k]:ip[k+1]],
+                           weights=arr['weights'][ip[k]:ip[k+1]],
+                           delta=arr['delta'][k].tolist()))
+    return shapes
+
+def shapes2dict(shapes):
+    """
+    geomdl dict of shapes (see arrays2shapes), as written by export_json.
+    """
+    ld=[]
+    for s in shapes:
+        d=dict(type='spline', rational=s['rational'], dimension=s['ctrlpts'].shape[1])
+        if s['pdim']==1:
+            d.update(degree=s['degree'][0], knotvector=s['knotvector'][0].tolist())
+        else:
+            d.update(degree_u=s['degree'][0], degree_v=s['degree'][1],
+                     knotvector_u=s['knotvector'][0].tolist(), knotvector_v=s['knotvector'][1].tolist(),
+                     size_u=s['size'][0], size_v=s['size'][1])
+        d['control_points']=dict(points=s['ctrlpts'].tolist())
+        if s['rational']:
+            d['control_points']['weights']=s['weights'].tolist()
+        d['delta']=s['delta'][0] if s['pdim']==1 else s['delta']
+        ld.append(d)
+    return dict(shape=dict(type='curve' if shapes[0]['pdim']==1 else 'surface',
+                           count=len(ld), data=ld))
+
+def json2npz(ifile, ofile=None):
+    """
+    Convert a geomdl JSON file to the binary store (default: same name .npz),
+    with the content hash of the JSON (array 'source', see syncbspline). The
+    store is written to a temporary file first so that readers never see a
+    partial store.
+    """
+    ofile=ofile or os.path.splitext(ifile)[0]+'.npz'
+    with open(ifile, 'rb') as f:
+        text=f.read()
+    arr=dict2arrays(json.loads(text))
+    arr['source']=np.array(hashlib.sha1(text).hexdigest())
+    with open(ofile+'.tmp', 'wb') as f:
+        np.savez(f, **arr)
+    os.replace(ofile+'.tmp', ofile)
+
+def npz2json(ifile, ofile=None):
+    """
+    Convert a binary store to a geomdl JSON file (default: same name .json).
+    Never called by the loaders, which only read the JSON.
+    """
+    ofile=ofile or os.path.splitext(ifile)[0]+'.json'
+    with open(ofile+'.tmp', 'w') as f:
+        f.write(json.dumps(shapes2dict(arrays2shapes(npzviews(ifile))), indent=4))
+    os.replace(ofile+'.tmp', ofile)
+
+def syncbspline(ifile):
+    """
+    Build the .npz of ifile (either extension) from its .json, if missing or
+    if the content hash it stores differs from the one of the .json (file
+    times are not used: copies and restores keep old times). The .json is
+    never written. Without .json, the .npz is used as it is.
+
+    :return: name of the .npz file
+    """
+    base=os.path.splitext(ifile)[0]
+    jfile, nfile=base+'.json', base+'.npz'
+    if not os.path.isfile(jfile):
+        return nfile
+    if os.path.isfile(nfile):
+        source=npzviews(nfile).get('source')
+        if source is not None and str(source)==filehash(jfile):
+            return nfile                                            # up to date
+    json2npz(jfile, nfile)
+    return nfile
+
+def loadbspline(ifile):
+    """
+    Shapes of a b-spline file (.json or .npz), read from the binary store
+    (see arrays2shapes), which is converted first if needed.
+    """
+    return arrays2shapes(npzviews(syncbspline(ifile)))
+
+#==============================================================================#
+# meshes
+
+def loadmesh(ifile):
+    """
+    Nodes and connectivity of a mesh store, as memory-mapped arrays.
+
+    :return: points, cells
+    """
+    views=npzviews(ifile)
+    return views['points'], views['cells']
+
+#==============================================================================#
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+
+#==============================================================================#
+# Author(s)  : Filippo AGNELLI (LMS / X / CNRS)                                #
+#              e-mail: filippo.agnelli@polytechnique.edu                       #
+#==============================================================================#
+# Description: Affine transforms of geomdl b-splines. Reflections, rotations   #
+#              and translations are 4x4 homogeneous matrices, applied to the   #
+#              stacked control points of a whole container in one matmul; the  #
+#              shallow clone only copies the control points, not the knot      #
+#              vectors, evaluators or caches that deepcopy would duplicate.    #
+#==============================================================================#
+# Version    : v.2026-10-17 .......................................... pass    #
+#==============================================================================#
+# Risks      : NURBS weights are kept, which is exact for affine maps only     #
+#==============================================================================#
+
+import copy
+import numpy as np
+from geomdl import multi                                     # geomdl containers
+
+def translation(vec):
+    """
+    Homogeneous matrix of the translation by vec (2 or 3 components).
+    """
+    mat=np.eye(4)
+    mat[:len(vec),3]=vec
+    return mat
+
+def rotation(angle, center=(0.,0.)):
+    """
+    Homogeneous matrix of the rotation of angle (degrees) about the z axis
+    through center (x, y), as operations.rotate with axis=2.
+    """
+    c, s=np.cos(np.radians(angle)), np.sin(np.radians(angle))
+    rot=np.eye(4)
+    rot[:2,:2]=[[c, -s], [s, c]]
+    return translation(center[:2])@rot@translation([-x for x in center[:2]])
+
+def reflection(p1, p2):
+    """
+    Homogeneous matrix of the reflection about the line (p1, p2) of the xy
+    plane, i.e. about the vertical plane through it (z is unchanged).
+    """
+    if not p1 or not p2 or not isinstance(p1, (tuple, list)) or not isinstance(p2, (tuple, list)):
+        print("The input must be a list or a tuple")
+        exit(1)
+    d=np.array(p2[:2], dtype=float)-p1[:2]
+    d/=np.linalg.norm(d)
+    mat=np.eye(4)
+    mat[:2,:2]=2*np.outer(d, d)-np.eye(2)
+    mat[:2,3]=p1[:2]-mat[:2,:2]@p1[:2]
+    return mat
+
+def shapes(obj):
+    """
+    List of the shapes of a b-spline or of a container.
+    """
+    return list(obj) if isinstance(obj, multi.AbstractContainer) else [obj]
+
+def clone(obj):
+    """
+    Shallow copy of a b-spline or of a container. Only the control points
+    and the lists that geomdl updates in place are copied, the knot vectors
+    and evaluators are shared and the caches are emptied.
+    """
+    new=copy.copy(obj)
+    for k, v in vars(obj).items():
+        if isinstance(v, (list, dict)):
+            setattr(new, k, copy.copy(v))
+    new._cache={k:type(v)() for k, v in obj._cache.items()}
+    if isinstance(obj, multi.AbstractContainer):
+        new._elements=[clone(g) for g in obj]
+    else:
+        new._control_points=[list(pt) for pt in obj._control_points]
+        if hasattr(obj, '_control_points2D'):
+            nv=obj.ctrlpts_size_v
+            new._control_points2D=[new._control_points[i:i+nv]
+                                   for i in range(0, len(new._control_points), nv)]
+        new.reset(evalpts=True)
+    return new
+
+def transform(obj, mat, **kwargs):
+    """
+    Apply the homogeneous matrix mat (see translation, rotation, reflection)
+    to the control points of all shapes of obj at once.
+
+    Keyword Arguments:
+        * ``inplace``: if False, operation applied to a clone of the object. *Default: False*
+
+    :param obj: input geometry
+    :type obj: abstract.SplineGeometry or multi.AbstractContainer
+    :param mat: 4x4 homogeneous matrix
+    :return: transformed geometry object
+    """
+    geom=obj if kwargs.get('inplace', False) else clone(obj)
+    lg=shapes(geom)
+    dim=obj.dimension
+
+    pts=np.zeros((sum(len(g.ctrlpts) for g in lg), 4)); pts[:,3]=1.
+    pts[:,:dim]=np.concatenate([g.ctrlpts for g in lg])
+    pts=pts@np.asarray(mat).T
+
+    i=0
+    for g in lg:
+        n=len(g.ctrlpts)
+        g.ctrlpts=pts[i:i+n,:dim].tolist()
+        i+=n
+    return geom
+
+#==============================================================================#
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+
+#==============================================================================#
+# Author(s)  : Filippo AGNELLI (LMS / X / CNRS)                                #
+#              e-mail: filippo.agnelli@polytechnique.edu                       #
+#==============================================================================#
+# Description: Design space of lofted ribbon surfaces. Variants (levels of the #
+#              nu curves and perturbations of the control net) are stacked in  #
+#              one control-net tensor; z-levels, surface grids and the 16      #
+#              symmetric images of the unit cell are evaluated for a chunk of  #
+#              variants at once, and the cell meshes are streamed to disk.     #
+#==============================================================================#
+# Version    : v.2026-10-17 .......................................... pass    #
+#==============================================================================#
+# Risks      : same cell construction as ribbon_base2cell_3d-surf.py           #
+#==============================================================================#
+
+import json
+import os
+
+import numpy as np
+
+from bsplinebasis import evalrows, memobasis
+from bsplineopt import knotvectoruniform
+from bsplinetransform import reflection, rotation
+from bspline2mesh import gridfaces, levelsolver
+from meshweld import flipcells, orientcells, weldrounded
+from mesh2file import arrays2file
+from instrument import stage, count
+
+def loftnets(curves, levels, dnet=None):
+    """
+    Control nets of the lofted surfaces of the base curves (one per nu, all
+    with the same number of control points) placed at the given levels.
+
+    :param curves: control points of the curves (nlev, ncp, 2)
+    :param levels: z of every curve, for every variant (nvar, nlev)
+    :param dnet: perturbations of the nets (nvar, nlev, ncp, 3), or None
+    :return: nets (nvar, nlev, ncp, 3)
+    """
+    curves=np.asarray(curves, dtype=float)
+    levels=np.atleast_2d(np.asarray(levels, dtype=float))
+    nets=np.empty(levels.shape+curves.shape[1:2]+(3,))
+    nets[...,:2]=curves
+    nets[...,2]=levels[:,:,None]
+    if dnet is not None:
+        nets+=dnet
+    return nets
+
+def cellmatrices(centers):
+    """
+    Homogeneous matrices of the 16 surfaces of the unit cell (4 rotations of
+    the base about its first control point, then the symmetries about x=0.5
+    and y=0.5), in the order of ribbon_base2cell_3d-surf.py.
+
+    :param centers: first control point of the base, for every variant (nvar, 2)
+    :return: array (nvar, 16, 4, 4)
+    """
+    sx=reflection((0.5,0., 0), (0.5,1., 0))
+    sy=reflection((0.,0.5, 0), (1.,0.5, 0))
+    return np.array([[s@rotation(a, c) for s in (np.eye(4), sx, sy@sx, sy)
+                      for a in (0, 90, 180, 270)] for c in np.asarray(centers)])
+
+def cellfaces(nz, nv, nshapes=16, quad=False):
+    """
+    Connectivity (ncells x k) of nshapes grids of nz x nv points numbered one
+    shape after the other.
+    """
+    f=gridfaces(nz, nv, quad).reshape(-1, 5 if quad else 4)[:,1:]
+    return np.concatenate([f+k*nz*nv for k in range(nshapes)])
+
+def designmeshes(curves, levels, dnet=None, h=1., dens=15, mode='tri', degree=3,
+                 chunk=256):
+    """
+    Shell meshes of the unit cells of all variants at height h, as the mesh
+    generators (0.02 steps in z, dens points along the curves, nodes
+    rounded to 4 decimals and merged, faces oriented outward). The surfaces
+    are of given degree in both directions with uniform clamped knot
+    vectors, as ribbon_base_3d-surf.
+    Variants are evaluated by chunks, those with the same number of z-levels
+    together. The orientation of every shape is computed for the first
+    variant met (see orientcells) and reused for all of them, so that the
+    normals agree across the design space.
+
+    :param curves, levels, dnet: variants (see loftnets)
+    :return: generator of (index of variant, points, cells)
+    """
+    if mode not in ('tri', 'quad'):
+        print('unknown mode', mode)
+        exit(1)
+    curves=np.asarray(curves, dtype=float)
+    levels=np.atleast_2d(np.asarray(levels, dtype=float))
+    nlev, ncp=curves.shape[:2]
+    kvu, kvv=knotvectoruniform(degree, nlev), knotvectoruniform(degree, ncp)
+    Bv=memobasis(degree, tuple(kvv), tuple(np.linspace(0, 1, dens)), ncp)
+    faces=dict()                  # oriented connectivity per number of z-levels
+    sflip=None                                 # reversed faces, for every shape
+
+    for k0 in range(0, len(levels), chunk):
+        nets=loftnets(curves, levels[k0:k0+chunk], None if dnet is None else dnet[k0:k0+chunk])
+        zmin, zmax=nets[...,2].min(axis=(1, 2)), nets[...,2].max(axis=(1, 2))
+        lnz=(h*(zmax-zmin)/0.02).astype(int)+1
+        mats=cellmatrices(nets[:,0,0,:2])
+        for nz in np.unique(lnz):
+            ig=np.flatnonzero(lnz==nz)
+            lz=np.around(0.02*np.arange(nz), 6)
+            with stage('solve'):
+                lu=levelsolver(degree, kvu, nets[ig,:,0,2], np.clip(lz/h, zmin[ig,None], zmax[ig,None]))
+            with stage('evaluate'):
+                iso=evalrows(degree, kvu, nets[ig], lu)       # (g, nz, ncp, 3)
+                p=np.einsum('gzbc,jb->gzjc', iso, Bv).reshape(len(ig), -1, 3)
+                count('evaluations', p.shape[0]*p.shape[1])
+            with stage('transform'):
+                p=np.einsum('gsij,gnj->gsni', mats[ig,:,:3,:3], p)+mats[ig,:,None,:3,3]
+                p=np.around(p*np.array([1, 1, h]), decimals=4).reshape(len(ig), -1, 3)
+            if nz not in faces:
+                with stage('triangulate'):
+                    f=cellfaces(nz, dens, mats.shape[1], mode=='quad')
+                    if sflip is None:
+                        points, cells=weldrounded(p[0], f)
+                        flipped=(orientcells(points, cells)!=cells).any(axis=1)
+                        sflip=flipped.reshape(mats.shape[1], -1).any(axis=1)
+                    faces[nz]=flipcells(f, np.repeat(sflip, len(f)//mats.shape[1]))
+            for g, k in enumerate(ig):
+                with stage('triangulate'):
+                    points, cells=weldrounded(p[g], faces[nz])
+                count('points', len(points))
+                count('quads' if mode=='quad' else 'triangles', len(cells))
+                yield int(k0+k), points, cells
+
+def rundesign(curves, levels, odir, dnet=None, h=1., dens=15, mode='tri', degree=3,
+              formats=('npz',), chunk=256, eltype=None):
+    """
+    Write the cell meshes of all variants (see designmeshes) to odir, one
+    file per variant and format, and an index design.jsonl with one line per
+    variant (levels, perturbation norm, files, nodes and elements), so that
+    studies over the geometric parameters read back their inputs.
+
+    :param eltype: Abaqus element type (see writeinp)
+    :return: list of the index entries
+    """
+    ext={'npz':'.npz', 'abaqus':'.inp', 'avsucd':'.avs', 'stl':'.stl'}
+    levels=np.atleast_2d(np.asarray(levels, dtype=float))
+    index=[]
+    os.makedirs(odir, exist_ok=True)
+    with open(os.path.join(odir, 'design.jsonl'), 'w') as f:
+        for k, points, cells in designmeshes(curves, levels, dnet, h, dens, mode, degree, chunk):
+            name='ribbon_design_%06d_h=%.2f_3d-shell'%(k, h)
+            ofiles={fmt:os.path.join(odir, fmt, name+ext[fmt]) for fmt in formats}
+            arrays2file(points, cells, ofiles, eltype)
+            entry=dict(variant=k, h=h, levels=levels[k].tolist(),
+                       dnet=0. if dnet is None else float(np.abs(dnet[k]).max()),
+                       files=ofiles, nodes=len(points), elements=len(cells))
+            f.write(json.dumps(entry)+'\n')
+            index.append(entry)
+    return index
+
+#==============================================================================#
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+
+#==============================================================================#
+# Author(s)  : Filippo AGNELLI (LMS / X / CNRS)                                #
+#              e-mail: filippo.agnelli@polytechnique.edu                       #
+#==============================================================================#
+# Description: Quality of a b-spline fit: distance from every cloud point to   #
+#              its closest point on the curve, first found among a dense       #
+#              sampling held in a KD-tree, then refined by vectorized Newton   #
+#              projection. Reports the max and RMS deviations of each shape.   #
+#==============================================================================#
+# Version    : v.2026-10-17 .......................................... pass    #
+#==============================================================================#
+# Risks      : distances are in the units of the cloud (cell size = 1)         #
+#==============================================================================#
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from bsplinebasis import evalcurve, projectcloud
+from bsplineopt import knotvectoruniform
+
+def curvedistances(degree, kv, ctrlpts, cloud, t=None):
+    """
+    Distance from every point of the cloud to the curve.
+
+    :param t: parameters of a previous projection (warm start), else KD-tree
+    :return: distances (n,) and parameters of the closest points (n,)
+    """
+    cloud=np.asarray(cloud, dtype=float)
+    t=projectcloud(degree, kv, ctrlpts, cloud, t)
+    return np.linalg.norm(evalcurve(degree, kv, ctrlpts, t)-cloud, axis=1), t
+
+def fitquality(degree, kv, ctrlpts, cloud):
+    """
+    Max and RMS distances from the cloud to the curve.
+
+    :return: dict(max=, rms=)
+    """
+    dist, _=curvedistances(degree, kv, ctrlpts, cloud)
+    return dict(max=dist.max(), rms=np.sqrt(np.mean(dist**2)))
+
+def fitqualitybatch(degree, kv, lctrlpts, cloud, workers=None):
+    """
+    Fit quality (see fitquality) of many candidate control polygons for the
+    same cloud, over a process pool of workers processes (all cores by
+    default, 1 to stay serial).
+
+    :return: list of dict(max=, rms=), in the order of lctrlpts
+    """
+    n=len(lctrlpts)
+    workers=workers or os.cpu_count()
+    if workers>1 and n>1:
+        workers=min(workers, n)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(fitquality, [degree]*n, [kv]*n, lctrlpts, [cloud]*n,
+                                 chunksize=max(1, n//(4*workers))))
+    return [fitquality(degree, kv, cp, cloud) for cp in lctrlpts]
+
+def fitreport(dictctrlpts, dictcloud, degree):
+    """
+    Print and return the fit quality of every shape (uniform clamped knot
+    vector, as generate_knot_vector).
+
+    :param dictctrlpts: {nu: control points}
+    :param dictcloud: {nu: cloud}
+    :return: {nu: dict(max=, rms=)}
+    """
+    report=dict()
+    for nu, cp in dictctrlpts.items():
+        kv=knotvectoruniform(degree, len(cp))
+        report[nu]=fitquality(degree, kv, np.asarray(cp, dtype=float), dictcloud[nu])
+        print('nu=', nu, '; max=%.2e ; rms=%.2e'%(report[nu]['max'], report[nu]['rms']))
+    return report
+
+#==============================================================================#
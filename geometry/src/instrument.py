@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+
+#==============================================================================#
+# Author(s)  : Filippo AGNELLI (LMS / X / CNRS)                                #
+#              e-mail: filippo.agnelli@polytechnique.edu                       #
+#==============================================================================#
+# Description: Instrumentation of the geometry chain: time of every stage      #
+#              (import, transform, solve, evaluate, triangulate, export),      #
+#              counters (b-spline evaluations, solver iterations, points,      #
+#              elements) and memory peak of every case, reset per case. The    #
+#              modules a case imports when needed can be preloaded, their time #
+#              being reported with the first case as an import stage.          #
+#              Disabled, a stage is a shared null context and a count a test.  #
+#==============================================================================#
+# Version    : v.2026-10-17 .......................................... pass    #
+#==============================================================================#
+# Risks      : stage times are inclusive, stages must not be nested            #
+#==============================================================================#
+
+import cProfile
+import importlib
+import json
+import signal
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+try:
+    import resource                                  # peak resident size (unix)
+except ImportError:
+    resource=None
+
+records=None              # stage times and counters of this process (None: off)
+nostage=nullcontext()                        # stage of disabled instrumentation
+
+def enable(on=True, memory=False):
+    """
+    Switch the instrumentation of the current process on (records cleared)
+    or off. With memory, the peak of the memory allocated by python and
+    numpy during every case is traced with tracemalloc (slower).
+    """
+    global records
+    records=dict(stages=dict(), counters=dict(), memory=memory, base=0,
+                 preload=None) if on else None
+    if on and memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    elif not (on and memory) and tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+def preload(modules):
+    """
+    Import the modules that the cases import when needed (e.g. scipy.sparse),
+    if the instrumentation is enabled. Their import time is reported as the
+    import stage of the next case, instead of inflating its other stages.
+    """
+    if records is None:
+        return
+    t0=time.perf_counter()
+    for m in modules:
+        importlib.import_module(m)
+    records['preload']=time.perf_counter()-t0
+
+def reset():
+    """
+    Clear the stage times and counters, and start the memory peak of a case
+    from the memory allocated so far.
+    """
+    if records is None:
+        return
+    records['stages'].clear(); records['counters'].clear()
+    if records['preload'] is not None:               # first case of the process
+        records['stages']['import']=records['preload']; records['preload']=None
+    if records['memory']:
+        tracemalloc.reset_peak()
+        records['base']=tracemalloc.get_traced_memory()[0]
+
+@contextmanager
+def timedstage(name):
+    """
+    Context adding its wall time to the stage name (see stage).
+    """
+    t0=time.perf_counter()
+    try:
+        yield
+    finally:
+        st=records['stages']
+        st[name]=st.get(name, 0.)+time.perf_counter()-t0
+
+def stage(name):
+    """
+    Context timing a stage, times of the same stage being summed. Does
+    nothing when the instrumentation is disabled.
+
+        with stage('solve'):
+            lu=dichotomysolver(shape, lz)
+    """
+    return nostage if records is None else timedstage(name)
+
+def count(name, n=1):
+    """
+    Add n to a counter, if the instrumentation is enabled.
+    """
+    if records is not None:
+        c=records['counters']
+        c[name]=c.get(name, 0)+int(n)
+
+def snapshot():
+    """
+    Stage times, counters and peak of the memory allocated on top of the
+    memory at the last reset (MB, with memory), None if the instrumentation
+    is disabled.
+    """
+    if records is None:
+        return None
+    snap=dict(stages=dict(records['stages']), counters=dict(records['counters']))
+    if records['memory']:
+        snap['peakalloc']=(tracemalloc.get_traced_memory()[1]-records['base'])/2**20
+    return snap
+
+def peakrss():
+    """
+    Peak resident size of the current process over its lifetime (MB), None
+    if unknown (not unix).
+    """
+    if resource is None:
+        return None
+    rss=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss     # kB linux, B mac
+    return rss/(2**20 if sys.platform=='darwin' else 2**10)
+
+def writejsonl(ofile, entries, mode='w'):
+    """
+    Write entries (dicts) as JSON lines.
+    """
+    with open(ofile, mode) as f:
+        for e in entries:
+            f.write(json.dumps(e, default=float)+'\n')
+
+#==============================================================================#
+# Profilers
+
+@contextmanager
+def sampling(ofile, interval=1e-3):
+    """
+    Statistical profiler: the stack of the main thread is sampled every
+    interval of CPU time (SIGPROF, unix only) and written as collapsed stacks
+    ('file:function;... count', for flame graphs) to ofile.
+    """
+    stacks=Counter()
+    def sample(signum, frame):
+        names=[]
+        while frame is not None:
+            names.append(frame.f_code.co_filename.rsplit('/', 1)[-1]+':'+frame.f_code.co_name)
+            frame=frame.f_back
+        stacks[';'.join(reversed(names))]+=1
+    old=signal.signal(signal.SIGPROF, sample)
+    signal.setitimer(signal.ITIMER_PROF, interval, interval)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_PROF, 0)
+        signal.signal(signal.SIGPROF, old)
+        with open(ofile, 'w') as f:
+            for s, n in stacks.most_common():
+                f.write('%s %d\n'%(s, n))
+
+@contextmanager
+def profiling(ofile, profiler='cprofile'):
+    """
+    Run the enclosed code under cProfile (stats dumped to ofile, read them
+    with pstats) or under the sampling profiler (see sampling).
+    """
+    if profiler=='sample':
+        with sampling(ofile):
+            yield
+    elif profiler=='cprofile':
+        pr=cProfile.Profile()
+        pr.enable()
+        try:
+            yield
+        finally:
+            pr.disable()
+            pr.dump_stats(ofile)
+    else:
+        print('unknown profiler', profiler)
+        exit(1)
+
+#==============================================================================#
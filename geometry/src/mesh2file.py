@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+
+#==============================================================================#
+# Author(s)  : Filippo AGNELLI (LMS / X / CNRS)                                #
+#              e-mail: filippo.agnelli@polytechnique.edu                       #
+#==============================================================================#
+# Description: Writes meshes (Abaqus .inp, AVS-UCD, binary STL, .npz) directly #
+#              from the node and connectivity arrays, without converting the   #
+#              mesh to meshio for each format. Text is formatted by chunks of  #
+#              rows in one operation, STL is written with a single tofile.     #
+#              Arrays of single precision (float32, int32) are written as they #
+#              are; pyvista and meshio meshes are only built on request.       #
+#==============================================================================#
+# Version    : v.2026-10-17 .......................................... pass    #
+#==============================================================================#
+# Risks      : homogeneous meshes only (lines, triangles or quadrangles)       #
+#==============================================================================#
+
+import os
+import numpy as np
+
+from instrument import stage
+
+celltypes={2:'line', 3:'triangle', 4:'quad'}              # nb of nodes -> type
+
+# element names: beams as written by meshio, shells (S4R: reduced integration)
+abaqustypes={'line':'B31H', 'triangle':'S3', 'quad':'S4R'}
+avstypes={'line':'line', 'triangle':'tri', 'quad':'quad'}
+
+def writerows(f, fmt, data, shift=0, chunk=65536):
+    """
+    Write the rows of a 2D array, preceded by their 1-based index and
+    shifted by shift, with the row format fmt, chunk rows at once (the
+    array itself is not copied). Floats are written (format %s) as the
+    shortest string that reads back to the same value in their precision,
+    so that 0.1898 is written 0.1898 in single and double precision.
+    """
+    for k in range(0, len(data), chunk):
+        block=data[k:k+chunk]
+        block=block+shift if shift else block
+        if block.dtype.kind=='f':                       # shortest float strings
+            rows=np.empty((len(block), block.shape[1]+1), dtype=object)
+            rows[:,1:]=block.astype(str) if block.dtype==np.float32 else block
+        else:
+            rows=np.empty((len(block), block.shape[1]+1), dtype=block.dtype)
+            rows[:,1:]=block
+        rows[:,0]=np.arange(k+1, k+len(block)+1)
+        f.write((fmt*len(block))%tuple(rows.ravel().tolist()))
+
+def writeinp(ofile, points, cells, eltype=None):
+    """
+    Abaqus input file: nodes and elements (1-based), of type eltype (default:
+    B31H beams, S3 or S4R shells).
+    """
+    eltype=eltype or abaqustypes[celltypes[cells.shape[1]]]
+    k=cells.shape[1]
+    with open(ofile, 'w') as f:
+        f.write('*HEADING\nAbaqus DataFile Version 6.14\nwritten by mesh2file\n')
+        f.write('*NODE\n')
+        writerows(f, '%d, %s, %s, %s\n', points)
+        f.write('*ELEMENT, TYPE='+eltype+'\n')
+        writerows(f, ','.join(['%d']*(k+1))+'\n', cells, 1)
+
+def writeavs(ofile, points, cells):
+    """
+    AVS-UCD file: nodes and cells (1-based, material 0), no data.
+    """
+    n, k=len(points), cells.shape[1]
+    with open(ofile, 'w') as f:
+        f.write('# Written by mesh2file\n')
+        f.write('%d %d 0 0 0\n'%(n, len(cells)))
+        writerows(f, '%d %s %s %s\n', points)
+        writerows(f, '%d 0 '+avstypes[celltypes[k]]+' %d'*k+'\n', cells, 1)
+
+def writestl(ofile, points, cells, chunk=65536):
+    """
+    Binary STL file, quadrangles being split into two triangles. Facets are
+    gathered and written chunk cells at once.
+    """
+    if cells.shape[1]<3:
+        print('STL can only write triangles and quadrangles')
+        return
+    split=[0, 1, 2, 0, 2, 3] if cells.shape[1]==4 else [0, 1, 2]
+    with open(ofile, 'wb') as f:
+        f.write('written by mesh2file'.ljust(80).encode())
+        f.write(np.array(len(cells)*len(split)//3, dtype='<u4').tobytes())
+        for k in range(0, len(cells), chunk):
+            pts=points[cells[k:k+chunk][:,split].reshape(-1, 3)]
+            normals=np.cross(pts[:,1]-pts[:,0], pts[:,2]-pts[:,0])
+            normals/=np.linalg.norm(normals, axis=1)[:,None]
+
+            a=np.empty(len(pts), dtype=[('normal', '<f4', 3), ('points', '<f4', (3, 3)),
+                                        ('attr', '<u2')])
+            a['normal']=normals; a['points']=pts; a['attr']=0
+            a.tofile(f)
+
+def writenpz(ofile, points, cells):
+    """
+    Binary .npz store of the node and connectivity arrays (see bsplinestore).
+    """
+    np.savez(ofile, points=points, cells=cells)
+
+def meshcells(mesh):
+    """
+    Points and homogeneous connectivity (ncells x k) of a pyvista PolyData.
+    """
+    flat=np.asarray(mesh.lines if len(mesh.lines) else mesh.faces)
+    return np.asarray(mesh.points), flat.reshape(-1, flat[0]+1)[:,1:]
+
+def arrays2polydata(points, cells):
+    """
+    Pyvista PolyData of node and connectivity (ncells x k) arrays, lines for
+    k=2 and faces otherwise.
+    """
+    import pyvista as pv                       # pyvista is imported when needed
+    flat=np.hstack([np.full((len(cells), 1), cells.shape[1]), cells]).ravel()
+    return pv.PolyData(points, lines=flat) if cells.shape[1]==2 else pv.PolyData(points, flat)
+
+def arrays2meshio(points, cells):
+    """
+    Meshio mesh of node and connectivity (ncells x k) arrays, e.g. to write
+    a format that mesh2file does not know.
+    """
+    import meshio                               # meshio is imported when needed
+    return meshio.Mesh(points, [(celltypes[cells.shape[1]], cells)])
+
+def arrays2file(points, cells, ofiles, eltype=None):
+    """
+    Write a mesh given by its node and connectivity (ncells x k) arrays to
+    every format of ofiles (see mesh2file).
+    """
+    for fmt, ofile in ofiles.items():
+        os.makedirs(os.path.dirname(ofile) or '.', exist_ok=True)
+        with stage('export'):
+            if   fmt=='abaqus': writeinp(ofile, points, cells, eltype)
+            elif fmt=='avsucd': writeavs(ofile, points, cells)
+            elif fmt=='stl':    writestl(ofile, points, cells)
+            elif fmt=='npz':    writenpz(ofile, points, cells)
+            else:
+                print('unknown format', fmt)
+                exit(1)
+
+def mesh2file(mesh, ofiles, eltype=None):
+    """
+    Write a pyvista PolyData to every format of ofiles ({format: filename},
+    formats 'abaqus', 'avsucd', 'stl' and 'npz'), from a single extraction of its
+    node and connectivity arrays. eltype is the Abaqus element type (see
+    writeinp).
+    """
+    arrays2file(*meshcells(mesh), ofiles, eltype)
+
+#==============================================================================#
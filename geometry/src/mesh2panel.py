@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+
+#==============================================================================#
+# Author(s)  : Filippo AGNELLI (LMS / X / CNRS)                                #
+#              e-mail: filippo.agnelli@polytechnique.edu                       #
+#==============================================================================#
+# Description: Builds the mesh of a N x M panel by instancing the mesh of a    #
+#              unit cell. Vertex arrays are offset for all cells at once and   #
+#              the periodic boundary nodes of neighbouring cells are merged    #
+#              through an index computed once on the unit cell.                #
+#==============================================================================#
+# Version    : v.2026-10-17 .......................................... pass    #
+#==============================================================================#
+# Risks      : the cell mesh must be periodic (matching opposite boundaries)   #
+#==============================================================================#
+
+import numpy as np
+
+from mesh2file import arrays2polydata, meshcells
+
+def matchnodes(points, ia, ib, axes, tol):
+    """
+    For every node of ia, the node of ib with the same coordinates along axes.
+    """
+    from scipy.spatial import cKDTree            # scipy is imported when needed
+    dist, k=cKDTree(points[ib][:,axes]).query(points[ia][:,axes])
+    if len(ia) and dist.max()>tol:
+        print('warning: non periodic cell mesh, max distance', dist.max())
+    return ib[k]
+
+def periodicpairs(points, tol=1e-6):
+    """
+    Periodic node pairs of a cell mesh: left[k] (x=xmin) matches right[k]
+    (x=xmax) and bottom[k] (y=ymin) matches top[k] (y=ymax).
+
+    :return: left, right, bottom, top
+    """
+    lo=points.min(axis=0); hi=points.max(axis=0)
+    left=np.flatnonzero(np.abs(points[:,0]-lo[0])<tol)
+    bottom=np.flatnonzero(np.abs(points[:,1]-lo[1])<tol)
+    right=matchnodes(points, left, np.flatnonzero(np.abs(points[:,0]-hi[0])<tol), [1, 2], tol)
+    top=matchnodes(points, bottom, np.flatnonzero(np.abs(points[:,1]-hi[1])<tol), [0, 2], tol)
+    return left, right, bottom, top
+
+def tilecell(points, cells, N, M, heights=None, tol=1e-6):
+    """
+    Panel of N (along x) by M (along y) cells. Cell (i,j) is the cell mesh
+    offset by (i,j) times the cell size and, if heights (N x M) is given,
+    scaled in z so that its height is heights[i,j]. Nodes shared by
+    neighbouring cells are merged (at their mean position when the heights
+    differ). The dtypes of points and cells are kept, indices being computed
+    in the dtype of cells (int32 halves the memory, see bspline2arrays).
+
+    :param cells: connectivity of the cell mesh (ncells x k)
+    :return: points, cells of the panel
+    """
+    n=len(points)
+    lo=points.min(axis=0); hi=points.max(axis=0)
+    left, right, bottom, top=periodicpairs(points, tol)
+
+    # instances: offset vertex arrays, cell (i,j) is instance i*M+j
+    i, j=np.divmod(np.arange(N*M), M)
+    pts=np.repeat(points[None], N*M, axis=0)
+    pts[..., 0]+=(i*(hi[0]-lo[0]))[:,None]
+    pts[..., 1]+=(j*(hi[1]-lo[1]))[:,None]
+    if heights is not None:
+        scale=np.asarray(heights, dtype=float).ravel()/(hi[2]-lo[2])
+        pts[..., 2]=lo[2]+(pts[..., 2]-lo[2])*scale[:,None]
+    pts=pts.reshape(-1, 3)
+
+    # merge index: right nodes point to the left nodes of the next cell along
+    # x, top nodes to the bottom nodes of the next cell along y
+    parent=np.arange(N*M*n, dtype=cells.dtype)
+    inst=np.flatnonzero(i<N-1)
+    parent[(inst[:,None]*n+right).ravel()]=((inst+M)[:,None]*n+left).ravel()
+    inst=np.flatnonzero(j<M-1)
+    parent[(inst[:,None]*n+top).ravel()]=((inst+1)[:,None]*n+bottom).ravel()
+    while True:                                              # pointer jumping
+        root=parent[parent]
+        if np.array_equal(root, parent): break
+        parent=root
+
+    keep=parent==np.arange(N*M*n, dtype=cells.dtype)
+    newid=(np.cumsum(keep, dtype=cells.dtype)-1)[parent]
+    if heights is None:
+        ppts=pts[keep]
+    else:
+        cnt=np.bincount(newid)
+        ppts=np.stack([np.bincount(newid, weights=pts[:,d])/cnt for d in range(3)], axis=1)
+        ppts=ppts.astype(points.dtype, copy=False)
+    pcells=newid[(cells[None]+(np.arange(N*M, dtype=cells.dtype)*n)[:,None,None]).reshape(-1, cells.shape[1])]
+    return ppts, pcells
+
+def mesh2panel(mesh, N, M, heights=None, tol=1e-6):
+    """
+    Panel of N x M cells from a pyvista cell mesh of homogeneous faces or
+    lines (see tilecell).
+    """
+    points, cells=meshcells(mesh)
+    return arrays2polydata(*tilecell(points, cells, N, M, heights, tol))
+
+#==============================================================================#
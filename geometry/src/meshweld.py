@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+
+#==============================================================================#
+# Author(s)  : Filippo AGNELLI (LMS / X / CNRS)                                #
+#              e-mail: filippo.agnelli@polytechnique.edu                       #
+#==============================================================================#
+# Description: Welding of coincident mesh nodes. Pairs of nodes closer than a  #
+#              tolerance are found with a KD-tree, merged by connected         #
+#              components, and the connectivity is remapped in one gather, so  #
+#              that multi-patch meshes are conforming (a 1D unique on packed   #
+#              keys when the nodes are rounded). Welded shell meshes are       #
+#              oriented: the normals of all patches of a surface agree and     #
+#              point outward (e.g. mirrored patches of the unit cell).         #
+#==============================================================================#
+# Version    : v.2026-10-17 .......................................... pass    #
+#==============================================================================#
+# Risks      : tol must stay well below the mesh size                          #
+#==============================================================================#
+
+import numpy as np
+
+from instrument import count
+
+def weldmap(points, tol=1e-6):
+    """
+    Index of the welded node of every point. Welded nodes are numbered in the
+    order of their first point, so that a mesh without coincident points is
+    left unchanged.
+
+    :return: newid (n,) and first (m,), the first point of every welded node
+    """
+    from scipy import sparse                     # scipy is imported when needed
+    from scipy.sparse.csgraph import connected_components
+    from scipy.spatial import cKDTree
+    n=len(points)
+    pairs=cKDTree(points).query_pairs(tol, output_type='ndarray')
+    graph=sparse.coo_matrix((np.ones(len(pairs)), (pairs[:,0], pairs[:,1])), shape=(n, n))
+    ncomp, lab=connected_components(graph, directed=False)
+
+    first=np.full(ncomp, n); np.minimum.at(first, lab, np.arange(n))
+    order=np.argsort(first)
+    rank=np.empty(ncomp, dtype=int); rank[order]=np.arange(ncomp)
+    return rank[lab], first[order]
+
+def roundedmap(points, decimals=4):
+    """
+    Index of the welded node of every point of a mesh whose nodes are rounded
+    to decimals, as weldmap with a tolerance below the rounding step. Points
+    are packed in one integer key, so that a 1D unique replaces the KD-tree.
+
+    :return: newid (n,) and first (m,), the first point of every welded node
+    """
+    q=np.rint(points*10**decimals).astype(np.int64)
+    q-=q.min(axis=0)
+    if q.max()<2**21:
+        key=(q[:,0]<<42)|(q[:,1]<<21)|q[:,2]
+    else:
+        key=q
+    _, first, inv=np.unique(key, axis=0 if key.ndim>1 else None, return_index=True, return_inverse=True)
+    order=np.argsort(first)
+    rank=np.empty(len(first), dtype=int); rank[order]=np.arange(len(first))
+    return rank[inv.ravel()], first[order]
+
+def weldrounded(points, cells, decimals=4):
+    """
+    Merge the identical points of a mesh whose nodes are rounded to decimals
+    (see roundedmap).
+
+    :return: points, cells
+    """
+    newid, first=roundedmap(points, decimals)
+    return points[first], newid[cells]
+
+def weld(points, cells, tol=1e-6):
+    """
+    Merge the points closer than tol.
+
+    :param cells: connectivity array of any shape (e.g. ncells x 3)
+    :return: points, cells and number of merged points
+    """
+    newid, first=weldmap(points, tol)
+    return points[first], newid[cells], len(points)-len(first)
+
+def remapcells(cells, newid):
+    """
+    Remap a flat vtk cell array ([n, i1..in, n, ...]), counts left untouched.
+    """
+    if len(cells)==0:
+        return cells
+    k=cells[0]+1
+    if len(cells)%k==0 and (cells[::k]==k-1).all():           # homogeneous
+        c=cells.reshape(-1, k)
+        return np.hstack([c[:,:1], newid[c[:,1:]]]).ravel()
+    cells=cells.copy(); i=0
+    while i<len(cells):
+        cells[i+1:i+1+cells[i]]=newid[cells[i+1:i+1+cells[i]]]
+        i+=cells[i]+1
+    return cells
+
+def orientcells(points, cells):
+    """
+    Consistent orientation of a mesh of faces (ncells x k, k>=3): two faces
+    sharing an edge (and only them, edges of junctions between more faces
+    are ignored) run through it in opposite directions, so that the normals
+    do not flip from a patch to the next. The faces and their flipped copies
+    are the nodes of a graph whose connected components give the orientation
+    of every face, then every connected surface is flipped as a whole so that
+    its normals point to its convex side (normals of neighbouring faces
+    diverge): outward of a ring, and of its pieces cut by the cell boundary.
+
+    :return: cells, the flipped ones reversed (first node kept)
+    """
+    from scipy import sparse                     # scipy is imported when needed
+    from scipy.sparse.csgraph import connected_components
+    n, k=cells.shape
+    a, b=cells.ravel(), np.roll(cells, -1, axis=1).ravel()      # half edges
+    key=np.minimum(a, b).astype(np.int64)*len(points)+np.maximum(a, b)
+    _, inv, cnt=np.unique(key, return_inverse=True, return_counts=True)
+    half=np.flatnonzero(cnt[inv]==2)
+    half=half[np.argsort(inv[half], kind='stable')]
+    i, j=half[0::2], half[1::2]                          # both sides of an edge
+    fi, fj=i//k, j//k
+    same=(a[i]<b[i])==(a[j]<b[j])                # same direction: one must flip
+    graph=sparse.coo_matrix((np.ones(2*len(i)), (np.concatenate([fi, fi+n]),
+                             np.concatenate([fj+n*same, fj+n*~same]))), shape=(2*n, 2*n))
+    ncomp, lab=connected_components(graph, directed=False)
+    flip=lab[n:]<lab[:n]
+    comp=np.minimum(lab[:n], lab[n:])
+
+    # outward: sum over the edges of (ni-nj).(ci-cj), positive when convex
+    pts=points[cells]
+    if k==3:
+        normals=np.cross(pts[:,1]-pts[:,0], pts[:,2]-pts[:,0])
+    else:
+        normals=np.cross(pts[:,2]-pts[:,0], pts[:,3]-pts[:,1])
+    normals/=np.maximum(np.linalg.norm(normals, axis=1), 1e-300)[:,None]
+    normals[flip]*=-1
+    centers=pts.mean(axis=1)
+    spread=((normals[fi]-normals[fj])*(centers[fi]-centers[fj])).sum(axis=1)
+    flip^=np.bincount(comp[fi], weights=spread, minlength=ncomp)[comp]<0
+    count('flipped', int(flip.sum()))
+    return flipcells(cells, flip)
+
+def flipcells(cells, flip):
+    """
+    Copy of cells (ncells x k) with the faces of the boolean mask flip
+    reversed, first node kept (cells itself if none is flipped).
+    """
+    if not np.any(flip):
+        return cells
+    cells=cells.copy()
+    cells[flip]=cells[flip][:,[0]+list(range(cells.shape[1]-1, 0, -1))]
+    return cells
+
+def weldmeshes(meshes, tol=1e-6):
+    """
+    Welded union of pyvista PolyData (faces and lines), a conforming
+    replacement for accumulating meshes with +=. The number of merged points
+    is stored in the field data 'merged'.
+    """
+    import pyvista as pv                       # pyvista is imported when needed
+    lp=[]; lf=[]; ll=[]; n=0
+    for mk in meshes:
+        shift=np.arange(mk.n_points)+n
+        lp.append(np.asarray(mk.points))
+        lf.append(remapcells(np.asarray(mk.faces), shift))
+        ll.append(remapcells(np.asarray(mk.lines), shift))
+        n+=mk.n_points
+    points=np.vstack(lp)
+    faces=np.concatenate(lf).astype(int)
+    lines=np.concatenate(ll).astype(int)
+
+    newid, first=weldmap(points, tol)
+    m=pv.PolyData(points[first], faces=remapcells(faces, newid) if len(faces) else None,
+                  lines=remapcells(lines, newid) if len(lines) else None)
+    m.field_data['merged']=[len(points)-len(first)]
+    return m
+
+def weldmesh(mesh, tol=1e-6):
+    """
+    Welded copy of a pyvista PolyData (see weldmeshes).
+    """
+    return weldmeshes([mesh], tol)
+
+#==============================================================================#
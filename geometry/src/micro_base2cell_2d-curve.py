@@ -21,28 +21,27 @@ out=True                                       # set to True to export mesh data
 graph=True                             # set to True for graphical visualization
 
 # Loading external modules
-import copy
-import numpy as np
 from geomdl import exchange                           # import & export b-spline
 from geomdl import multi                                     # geomdl containers
 from geomdl import operations
-
-import matplotlib.pyplot as plt
+from bsplinebasis import curvepoints
+from bsplinetransform import transform, reflection, rotation
+from options import setoptions, srcdir
 
 #==============================================================================#
 # Input arguments
 
-listnu=['-0.0','-0.2','-0.4','-0.6','-0.8']
+listnu=['-0.0','-0.2','-0.4','-0.6','-0.8']          # or from the command line
 
 # Input
-idirname='../b-spline/'
+idirname=srcdir+'../b-spline/'
 
 def ifilename(nu):                                    # generate input file name
     nfile='micro_nu='+nu+'_base_2d-curve.json'
     return nfile
 	
 # Output
-odirname='../b-spline/'
+odirname=srcdir+'../b-spline/'
 
 def ofilename(nu):                                   # generate output file name
     nfile='micro_nu='+nu+'_cell_3d-curve.json'
@@ -51,48 +50,26 @@ def ofilename(nu):                                   # generate output file name
 #==============================================================================#
 def symmetry(obj, p1, p2, **kwargs):
 
-    """ Translates curves, surface or volumes by the input vector.
+    """ Symmetrizes curves, surface or volumes about the line (p1, p2).
 
     Keyword Arguments:
         * ``inplace``: if False, operation applied to a copy of the object. *Default: False*
 
     :param obj: input geometry
     :type obj: abstract.SplineGeometry or multi.AbstractContainer
-    :param vec: translation vector
-    :type vec: list, tuple
-    :return: translated geometry object
+    :param p1, p2: points of the symmetry line (xy plane)
+    :type p1, p2: list, tuple
+    :return: symmetrized geometry object
     """
-    # Input validity checks
-    if not p1 or not p2 or not isinstance(p1, (tuple, list)) or not isinstance(p2, (tuple, list)):
-        print("The input must be a list or a tuple")
-        exit()
-
     # Input validity checks
     if len(p1) != obj.dimension or len(p2) != obj.dimension:
         print("The input vector must have " + str(obj.dimension) + " components")
         exit()
-        
-    # Keyword arguments
-    inplace=kwargs.get('inplace', False)
-
-    if not inplace:
-        geom=copy.deepcopy(obj)
-    else:
-        geom=obj
-   
-#   symmetry control points
-    am=np.linalg.inv(np.array([[p2[1]-p1[1],p1[0]-p2[0]],[p2[0]-p1[0],p2[1]-p1[1]]]))
-
-    for g in geom:
-        new_ctrlpts=[]
-        for pt in g.ctrlpts:
-            b=np.array([(p1[1]-p2[1])*(pt[0]-2*p1[0])+(p1[0]-p2[0])*(2*p1[1]-pt[1]),(p2[0]-p1[0])*pt[0]+(p2[1]-p1[1])*pt[1]])
-            temp=np.matmul(am, b)
-            new_ctrlpts.append(temp.tolist())
-        new_ctrlpts=[cp2+[0] for cp2 in new_ctrlpts]
-        g.ctrlpts=new_ctrlpts
-
-    return geom
+
+#   symmetry control points, all shapes at once
+    return transform(obj, reflection(p1, p2), **kwargs)
+
+listnu=setoptions(globals()) or listnu         # key=value options, then nu
 
 #==============================================================================#
 # Build the unit cell from base wall
@@ -112,9 +89,9 @@ for nu in listnu:
 
 #   construct cross by rotating the base around the center
     l0=bsplcurve
-    l1=operations.rotate(l0, 90)
-    l2=operations.rotate(l0,180)
-    l3=operations.rotate(l0,270)
+    l1=transform(l0, rotation(90, l0.ctrlpts[0]))
+    l2=transform(l0, rotation(180, l0.ctrlpts[0]))
+    l3=transform(l0, rotation(270, l0.ctrlpts[0]))
     cross0.add([l0,l1,l2,l3])
     del l1, l2, l3
 
@@ -138,18 +115,21 @@ for nu in listnu:
 #==============================================================================#
 
 # Figure 1.
-print("Figure 1\n")
+if graph:
+    import matplotlib.pyplot as plt            # imported only to draw figures
+    print("Figure 1\n")
 
-fig=plt.figure(frameon=False)
-plt.axis('off')
-ax=plt.gca()
-ax.set_aspect('equal')
+    fig=plt.figure(frameon=False)
+    plt.axis('off')
+    ax=plt.gca()
+    ax.set_aspect('equal')
 
-lc=['C0','C1','C2','C3','C4']
+    lc=['C0','C1','C2','C3','C4']
 
-for i, nu in enumerate(listnu):
-	for curve in dictcell[nu]:
-		plt.plot(np.array(curve.evalpts)[:,0], np.array(curve.evalpts)[:,1], lw=3, color=lc[i])
+    for i, nu in enumerate(listnu):
+        for curve in dictcell[nu]:
+            p=curvepoints(curve)
+            plt.plot(p[:,0], p[:,1], lw=3, color=lc[i])
 #for curve in dictpspline:    
 #    plt.plot(np.array(curve.ctrlpts)[:,0],np.array(curve.ctrlpts)[:,1], 
 #             c='grey', lw=1, ls='dashdot', marker='o', mfc='k')
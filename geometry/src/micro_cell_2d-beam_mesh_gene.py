@@ -23,30 +23,35 @@ graph=True                             # set to True for graphical visualization
 # Loading external modules
 from geomdl import exchange                           # import & export b-spline
 from geomdl import multi                                     # geomdl containers
-import pyvista as pv
 
 from bspline2mesh import bspline2mesh
+from mesh2file import mesh2file
+from options import setoptions, srcdir
 
 #==============================================================================#
 # Input arguments
 
-listnu=['-0.0','-0.2','-0.4','-0.6','-0.8']
+listnu=['-0.0','-0.2','-0.4','-0.6','-0.8']          # or from the command line
 
 # Input
-idirname='../b-spline/'
+idirname=srcdir+'../b-spline/'
 
 def ifilename(nu):                                    # generate input file name
     nfile='micro_nu='+nu+'_cell_3d-curve.json'
     return nfile
 	
 # Output
-odirname='../mesh/2d-beam/'
+odirname=srcdir+'../mesh/2d-beam/'
 
 def ofilename(nu):                                   # generate output file name
     nfile='micro_nu='+nu+'_cell_2d-beam'
     return nfile
 
 nbno=15                                                   # number of mesh nodes
+chord=None        # chord deviation of adaptive sampling (None: nbno uniform)
+hmax=0.05                          # max element length of adaptive sampling
+
+listnu=setoptions(globals()) or listnu         # key=value options, then nu
 
 #==============================================================================#
 # Main code
@@ -62,13 +67,12 @@ for nu in listnu:
     dictcell[nu]=cell0
 
     # convert b-spline to mesh
-    dictcellmesh[nu]=bspline2mesh(dictcell[nu], nbno) 
+    dictcellmesh[nu]=bspline2mesh(dictcell[nu], nbno, chord=chord, hmax=hmax) 
 	
-	# export mesh to any Meshio format
+	# export mesh to every format at once
     if out:
-        pv.save_meshio(odirname+'avs-ucd/'+ofilename(nu)+'.avs',
-                       dictcellmesh[nu], file_format="avsucd")
-        pv.save_meshio(odirname+'abaqus/'+ofilename(nu)+'.inp',
-                       dictcellmesh[nu], file_format="abaqus")
+        mesh2file(dictcellmesh[nu], {'avsucd':odirname+'avs-ucd/'+ofilename(nu)+'.avs',
+                                     'abaqus':odirname+'abaqus/'+ofilename(nu)+'.inp',
+                                     'npz':odirname+'npz/'+ofilename(nu)+'.npz'})
 
 #==============================================================================#
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+
+#==============================================================================#
+# Author(s)  : Filippo AGNELLI (LMS / X / CNRS)                                #
+#              e-mail: filippo.agnelli@polytechnique.edu                       #
+#==============================================================================#
+# Description: Command line of the scripts: the options of a script (out,      #
+#              graph, nbno, lh, ...) are overridden by key=value arguments,    #
+#              e.g. python ribbon_cell_3d-shell_mesh_gene.py graph=False       #
+#              lh=[0.4,0.8], and the data directories are located from the     #
+#              sources, whatever the working directory.                        #
+#==============================================================================#
+# Version    : v.2026-10-17 .......................................... pass    #
+#==============================================================================#
+# Risks      : values are python literals, bare strings only for str options   #
+#==============================================================================#
+
+import ast
+import os
+import sys
+
+srcdir=os.path.dirname(os.path.abspath(__file__))+'/'      # directory of sources
+
+def setoptions(glob, argv=None):
+    """
+    Override the options of a script, glob being its globals(), by the
+    key=value arguments of argv (default: command line). Only existing
+    options can be set, to python literals; a value that is not a literal
+    is read as a string only if the option is a string (e.g. mode=quad).
+
+    :return: the other arguments (e.g. list of nu)
+    """
+    args=[]
+    for arg in sys.argv[1:] if argv is None else argv:
+        key, sep, val=arg.partition('=')
+        if not sep or not key.isidentifier():
+            args.append(arg)
+            continue
+        if key not in glob:
+            print('unknown option', key)
+            exit(1)
+        try:
+            glob[key]=ast.literal_eval(val)
+        except (ValueError, SyntaxError):
+            if not isinstance(glob[key], str):
+                print('invalid value for', key)
+                exit(1)
+            glob[key]=val
+    return args
+
+#==============================================================================#
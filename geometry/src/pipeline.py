@@ -0,0 +1,287 @@
+# -*- coding: utf-8 -*-
+
+#==============================================================================#
+# Author(s)  : Filippo AGNELLI (LMS / X / CNRS)                                #
+#              e-mail: filippo.agnelli@polytechnique.edu                       #
+#==============================================================================#
+# Description: Incremental runner of the geometry chain. Every script is a     #
+#              stage with declared inputs and outputs; the stages form a DAG   #
+#              through their files. Outputs are cached under a hash of the     #
+#              script, its modules, arguments and input contents, so that      #
+#              only stale stages are run again, in parallel when independent.  #
+#              Existing outputs that a run only changes by round-off are kept  #
+#              as they were, so that tracked files are not rewritten.          #
+#==============================================================================#
+# Version    : v.2026-10-17 .......................................... pass    #
+#==============================================================================#
+# Risks      : parameters set inside a script are only seen through its source #
+#==============================================================================#
+
+# Options
+workers=None                         # number of parallel stages (None: all cores)
+force=False                               # set to True to run every stage again
+
+# Loading external modules
+import ast
+import filecmp
+import glob
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from functools import lru_cache
+
+from options import setoptions, srcdir
+
+cachedir='../cache/'                               # artifacts, one dir per hash
+rootdir='../'                             # output paths are stored relative to it
+number=re.compile(r'[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?')        # numbers
+
+@lru_cache(maxsize=None)
+def localmodules(script):
+    """
+    Local modules imported by a script, directly or through other local
+    modules, at top level or inside functions (lazy imports). Parsed once
+    per script, when a stage is first hashed.
+    """
+    found=set(); todo=[script]
+    while todo:
+        with open(srcdir+todo.pop()) as fin:
+            tree=ast.parse(fin.read())
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names=[a.name for a in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.level==0 and node.module:
+                names=[node.module]
+            else:
+                continue
+            for name in names:
+                f=name.split('.')[0]+'.py'
+                if f not in found and os.path.isfile(srcdir+f):
+                    found.add(f); todo.append(f)
+    return tuple(sorted(found))
+
+def stage(name, script, inputs, outputs, args=()):
+    """
+    Stage of the pipeline: python script args, run from this directory. The
+    local modules of the script are part of its hash (see stagekey).
+
+    :param inputs: files read by the script
+    :param outputs: files written by the script, or glob patterns
+    """
+    return dict(name=name, script=script, args=list(args), inputs=list(inputs),
+                outputs=list(outputs))
+
+def stagekey(st):
+    """
+    Content hash of a stage: source of the script and of its modules (see
+    localmodules), arguments and contents of the input files.
+    """
+    h=hashlib.sha256()
+    for f in [st['script']]+list(localmodules(st['script']))+st['inputs']:
+        h.update(f.encode()+b'\0')
+        with open(f, 'rb') as fin:
+            h.update(hashlib.sha256(fin.read()).digest())
+    h.update(json.dumps(st['args']).encode())
+    return h.hexdigest()
+
+def parents(stages):
+    """
+    Dependencies of every stage: the stages producing one of its inputs.
+    """
+    producer=dict()
+    for k, st in enumerate(stages):
+        for f in st['outputs']:
+            producer[os.path.normpath(f)]=k
+    return [{producer[os.path.normpath(f)] for f in st['inputs']
+             if os.path.normpath(f) in producer} for st in stages]
+
+def outputfiles(st, t0=None):
+    """
+    Files matching the outputs of a stage (written after t0 if given).
+    """
+    lf=[]
+    for pattern in st['outputs']:
+        for f in sorted(glob.glob(pattern)):
+            if t0 is None or os.path.getmtime(f)>=t0:
+                lf.append(f)
+    return lf
+
+def store(st, key, t0):
+    """
+    Copy the outputs of a stage that has just run into the cache.
+    """
+    lf=outputfiles(st, t0)
+    tmp=cachedir+key+'.tmp/'
+    for f in lf:
+        rel=os.path.relpath(f, rootdir)
+        os.makedirs(os.path.dirname(tmp+rel), exist_ok=True)
+        shutil.copy(f, tmp+rel)
+    with open(tmp+'manifest.json', 'w') as fout:
+        json.dump([os.path.relpath(f, rootdir) for f in lf], fout)
+    shutil.rmtree(cachedir+key, ignore_errors=True)
+    os.replace(tmp, cachedir+key)
+
+def restore(key):
+    """
+    Put back the cached outputs of a stage, return False if not cached.
+    """
+    if not os.path.isfile(cachedir+key+'/manifest.json'):
+        return False
+    with open(cachedir+key+'/manifest.json') as fin:
+        lrel=json.load(fin)
+    for rel in lrel:
+        src, dst=cachedir+key+'/'+rel, rootdir+rel
+        if os.path.isfile(dst) and filecmp.cmp(src, dst, shallow=False):
+            continue                                 # same content, not touched
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        shutil.copy(src, dst)
+    return True
+
+def roundoff(old, new, tol=1e-12):
+    """
+    True if two text contents only differ by the round-off of their numbers
+    (relative or absolute difference below tol).
+    """
+    try:
+        old, new=old.decode('ascii'), new.decode('ascii')
+    except UnicodeDecodeError:
+        return False                                             # binary output
+    if number.split(old)!=number.split(new):
+        return False
+    return all(abs(float(a)-float(b))<=tol*max(1., abs(float(a)), abs(float(b)))
+               for a, b in zip(number.findall(old), number.findall(new)))
+
+def runstage(st, key):
+    """
+    Run the script of a stage in a subprocess, headless (no figures), and
+    cache its outputs. Outputs (not patterns) that existed before the run and
+    only changed by round-off get their previous content back.
+
+    :return: error message, None if ok
+    """
+    before=dict()
+    for f in st['outputs']:
+        if not glob.has_magic(f):
+            os.makedirs(os.path.dirname(f), exist_ok=True)
+            if os.path.isfile(f):
+                with open(f, 'rb') as fin:
+                    before[f]=fin.read()
+    t0=time.time()
+    env=dict(os.environ, MPLBACKEND='Agg')                 # no figure windows
+    res=subprocess.run([sys.executable, st['script']]+st['args']+['graph=False'], env=env,
+                       capture_output=True, text=True)
+    if res.returncode!=0:
+        return (res.stderr.strip().splitlines() or ['exit code %d'%res.returncode])[-1]
+    for f, old in before.items():
+        if os.path.isfile(f):
+            with open(f, 'rb') as fin:
+                new=fin.read()
+            if new!=old and roundoff(old, new):
+                with open(f, 'wb') as fout:
+                    fout.write(old)
+    store(st, key, t0)
+    return None
+
+def runpipeline(stages, workers=None, force=False):
+    """
+    Run the stale stages of the pipeline, each one as soon as the stages it
+    depends on are done. A stage whose hash is in the cache is not run, its
+    outputs are restored from the cache; the descendants of a failed stage
+    are skipped.
+
+    :return: summary, one dict per stage with its status, hash and time
+    """
+    lp=parents(stages)
+    summary=[dict(name=st['name'], status='pending', key=None, time=0.)
+             for st in stages]
+    running=dict()
+    t0=time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        while True:
+            for k, st in enumerate(stages):
+                s=summary[k]
+                if s['status']!='pending' or any(summary[p]['status'] not in ('cached', 'done') for p in lp[k]):
+                    if s['status']=='pending' and any(summary[p]['status'] in ('failed', 'skipped') for p in lp[k]):
+                        s['status']='skipped'
+                    continue
+                try:
+                    s['key']=stagekey(st)
+                except OSError as err:
+                    s['status']='failed'; s['error']=str(err)
+                    continue
+                if not force and restore(s['key']):
+                    s['status']='cached'
+                    continue
+                s['status']='running'; s['start']=time.perf_counter()
+                running[pool.submit(runstage, st, s['key'])]=k
+
+            if not running:
+                if all(s['status']!='pending' for s in summary):
+                    break
+                continue                 # stages unblocked by cached parents
+            done, _=wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                s=summary[running.pop(fut)]
+                s['error']=fut.result()
+                s['status']='done' if s['error'] is None else 'failed'
+                s['time']=time.perf_counter()-s.pop('start')
+
+    count={st:sum(s['status']==st for s in summary) for st in ('done', 'cached', 'failed', 'skipped')}
+    print('Pipeline: %d stages, %d run, %d cached, %d failed, %d skipped, %.2f s'
+          %(len(stages), count['done'], count['cached'], count['failed'],
+            count['skipped'], time.perf_counter()-t0))
+    for s in summary:
+        if s['status'] in ('failed', 'skipped'):
+            print('  '+s['status'], s['name'], s.get('error', ''))
+    return summary
+
+#==============================================================================#
+# Geometry chain
+
+listnu=['-0.0','-0.2','-0.4','-0.6','-0.8']
+
+bdirname='../b-spline/'
+mdirname='../mesh/'
+
+stages=[]
+
+# micro: base curve -> cell -> beam mesh, one branch per nu
+for nu in listnu:
+    stages.append(stage('micro cell nu='+nu, 'micro_base2cell_2d-curve.py',
+                        [bdirname+'micro_nu='+nu+'_base_2d-curve.json'],
+                        [bdirname+'micro_nu='+nu+'_cell_3d-curve.json'],
+                        [nu]))
+    stages.append(stage('micro mesh nu='+nu, 'micro_cell_2d-beam_mesh_gene.py',
+                        [bdirname+'micro_nu='+nu+'_cell_3d-curve.json'],
+                        [mdirname+'2d-beam/avs-ucd/micro_nu='+nu+'_cell_2d-beam.avs',
+                         mdirname+'2d-beam/abaqus/micro_nu='+nu+'_cell_2d-beam.inp',
+                         mdirname+'2d-beam/npz/micro_nu='+nu+'_cell_2d-beam.npz'],
+                        [nu]))
+
+# ribbon: base curves -> base surface -> cell and wall -> shell meshes
+stages.append(stage('ribbon base', 'ribbon_base_3d-surf_gene.py',
+                    [bdirname+'micro_nu='+nu+'_base_2d-curve.json' for nu in listnu],
+                    [bdirname+'ribbon_base_3d-surf.json', '../figures/ribbon_base_3d-surf.obj']))
+for name in ['cell', 'wall']:
+    stages.append(stage('ribbon '+name, 'ribbon_base2'+name+'_3d-surf.py',
+                        [bdirname+'ribbon_base_3d-surf.json'],
+                        [bdirname+'ribbon_'+name+'_3d-surf.json', '../figures/ribbon_'+name+'_3d-surf.obj']))
+    stages.append(stage('ribbon '+name+' mesh', 'ribbon_'+name+'_3d-shell_mesh_gene.py',
+                        [bdirname+'ribbon_'+name+'_3d-surf.json'],
+                        [mdirname+'3d-shell/*/ribbon_'+name+'_nu=*']))
+stages.append(stage('ribbon panel mesh', 'ribbon_panel_3d-shell_mesh_gene.py',
+                    [bdirname+'ribbon_cell_3d-surf.json'],
+                    [mdirname+'3d-shell/*/ribbon_panel_*']))
+
+if __name__=='__main__':
+    setoptions(globals())                  # key=value options of command line
+    os.chdir(srcdir)                  # paths of the stages are relative to src
+    summary=runpipeline(stages, workers, force)
+
+#==============================================================================#
@@ -21,70 +21,44 @@ out=True                                       # set to True to export mesh data
 graph=True                             # set to True for graphical visualization
 
 # Loading external modules
-import copy
-import numpy as np
 from geomdl import exchange                           # import & export b-spline
 from geomdl import multi                                     # geomdl containers
-from geomdl import operations
-
-import matplotlib.pyplot as plt
+from bsplinetransform import transform, reflection, rotation
+from options import setoptions, srcdir
 
 #==============================================================================#
 # Input arguments
 
 
-idirname='../b-spline/'                                                  # input
+idirname=srcdir+'../b-spline/'                                           # input
 ifilename='ribbon_base_3d-surf.json'
 
 
-odirname='../b-spline/'                                                 # output
+odirname=srcdir+'../b-spline/'                                          # output
 ofilename='ribbon_cell_3d-surf.json'
 
+setoptions(globals())                      # key=value options of command line
+
 #==============================================================================#
 def symmetry3d(obj, p1, p2, **kwargs):
 
-    """ Translates curves, surface or volumes by the input vector.
+    """ Symmetrizes curves, surface or volumes about the line (p1, p2).
 
     Keyword Arguments:
         * ``inplace``: if False, operation applied to a copy of the object. *Default: False*
 
     :param obj: input geometry
     :type obj: abstract.SplineGeometry or multi.AbstractContainer
-    :param vec: translation vector
-    :type vec: list, tuple
-    :return: translated geometry object
+    :param p1, p2: points of the symmetry line (xy plane)
+    :type p1, p2: list, tuple
+    :return: symmetrized geometry object
     """
-    # Input validity checks
-    if not p1 or not p2 or not isinstance(p1, (tuple, list)) or not isinstance(p2, (tuple, list)):
-        print("The input must be a list or a tuple")
-        exit()
-
     # Input validity checks
     if len(p1) != obj.dimension or len(p2) != obj.dimension:
         print("The input vector must have " + str(obj.dimension) + " components")
 
-        
-    # Keyword arguments
-    inplace = kwargs.get('inplace', False)
-
-    if not inplace:
-        geom = copy.deepcopy(obj)
-    else:
-        geom = obj
-   
-# Symmetry control points
-    am = np.linalg.inv(np.array([[p2[1]-p1[1],p1[0]-p2[0]],[p2[0]-p1[0],p2[1]-p1[1]]]))
-
-    for g in geom:
-        new_ctrlpts = []
-        for pt in g.ctrlpts:
-            b = np.array([(p1[1]-p2[1])*(pt[0]-2*p1[0])+(p1[0]-p2[0])*(2*p1[1]-pt[1]),(p2[0]-p1[0])*pt[0]+(p2[1]-p1[1])*pt[1]])
-            temp = np.matmul(am, b)
-            temp = np.append(temp, [pt[2]], axis=0)
-            new_ctrlpts.append(temp.tolist())
-        g.ctrlpts = new_ctrlpts
-
-    return geom
+# Symmetry control points, all shapes at once
+    return transform(obj, reflection(p1, p2), **kwargs)
 
 #==============================================================================#
 # Build the unit cell from base wall
@@ -99,9 +73,9 @@ pspline.append(bsplcurve)
 
 # construct cross by rotating the base around the center
 l0=bsplcurve
-l1=operations.rotate(l0, 90)
-l2=operations.rotate(l0,180)
-l3=operations.rotate(l0,270)
+l1=transform(l0, rotation(90, l0.ctrlpts[0]))
+l2=transform(l0, rotation(180, l0.ctrlpts[0]))
+l3=transform(l0, rotation(270, l0.ctrlpts[0]))
 cross0.add([l0,l1,l2,l3])
 del l1, l2, l3
 
@@ -118,6 +92,6 @@ del cross0, cross1, cross2, cross3
 	
 if out:
     exchange.export_json(cell0, odirname+ofilename)
-    exchange.export_obj(cell0,"../figures/ribbon_cell_3d-surf.obj")
+    exchange.export_obj(cell0,srcdir+"../figures/ribbon_cell_3d-surf.obj")
 
 #==============================================================================#
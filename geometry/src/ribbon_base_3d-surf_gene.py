@@ -24,7 +24,8 @@ graph=True                             # set to True for graphical visualization
 from geomdl import BSpline
 from geomdl import exchange                           # import & export b-spline
 from geomdl import utilities
-from geomdl.visualization import VisMPL
+
+from options import setoptions, srcdir
 
 #==============================================================================#
 # Input arguments
@@ -32,16 +33,18 @@ from geomdl.visualization import VisMPL
 listnu=['-0.0','-0.2','-0.4','-0.6','-0.8']
 
 # Input
-idirname='../b-spline/'
+idirname=srcdir+'../b-spline/'
 
 def ifilename(nu):                                    # generate input file name
     nfile='micro_nu='+nu+'_base_2d-curve.json'
     return nfile
 	
 # Output
-odirname='../b-spline/'
+odirname=srcdir+'../b-spline/'
 ofilename='ribbon_base_3d-surf.json'
 
+setoptions(globals())                      # key=value options of command line
+
 #==============================================================================#
 
 #lh=[0, 0.25, 0.5, 0.75, 1];             # 3rd coordinate (simple interpolation)
@@ -64,6 +67,6 @@ surf.delta=(bsplcurve.delta,bsplcurve.delta)
 
 if out:
     exchange.export_json(surf, odirname+ofilename)
-    exchange.export_obj(surf,"../figures/ribbon_base_3d-surf.obj")
+    exchange.export_obj(surf,srcdir+"../figures/ribbon_base_3d-surf.obj")
 
 #==============================================================================#
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+
+#==============================================================================#
+# Author(s)  : Filippo AGNELLI (LMS / X / CNRS)                                #
+#              e-mail: filippo.agnelli@polytechnique.edu                       #
+#==============================================================================#
+# Description: Generates the shell meshes of the unit cells of a design space  #
+#              of lofted ribbons: levels of the nu curves and perturbations of #
+#              the control net are sampled around the experimental surface,   #
+#              meshes and their index are written for parameter studies.       #
+#==============================================================================#
+# Version    : v.2026-10-17 .......................................... pass    #
+#==============================================================================#
+# Risks      : file and directory may be changed over time                     #
+#==============================================================================#
+
+# Options
+out=True                                       # set to True to export mesh data
+
+# Loading external modules
+import numpy as np
+from geomdl import exchange                           # import & export b-spline
+
+from design import designmeshes, rundesign
+from options import setoptions, srcdir
+
+#==============================================================================#
+# Input arguments
+
+listnu=['-0.0','-0.2','-0.4','-0.6','-0.8']
+
+# Input
+idirname=srcdir+'../b-spline/'
+
+def ifilename(nu):                                    # generate input file name
+    nfile='micro_nu='+nu+'_base_2d-curve.json'
+    return nfile
+
+# Output
+odirname=srcdir+'../mesh/3d-shell/design/'
+
+nbno=15                                                   # number of mesh nodes
+mode='tri'                                  # triangulation: 'tri' or 'quad'
+formats=('npz',)                    # any of 'npz', 'abaqus', 'avsucd', 'stl'
+eltype=None                  # Abaqus element type (None: S3 or S4R), e.g. 'S4'
+h=0.4                                                 # height of the unit cell
+
+# Design space
+#=============
+lh=[0, 0.21274969, 0.509597215, 0.733649002, 1]; # levels (obtained experimentally)
+nvar=1000                                                 # number of variants
+dlevel=0.1                              # amplitude of the interior level changes
+dnet=0.005                # deviation of the interior control points (in plane)
+seed=0
+
+setoptions(globals())                      # key=value options of command line
+
+#==============================================================================#
+# Main code
+
+curves=np.array([exchange.import_json(idirname+ifilename(nu))[0].ctrlpts for nu in listnu])
+
+# variants: interior levels shifted (kept ordered), interior control points moved
+rng=np.random.default_rng(seed)
+levels=np.repeat([lh], nvar, axis=0)
+levels[:,1:-1]=np.sort(levels[:,1:-1]+rng.uniform(-dlevel, dlevel, (nvar, len(lh)-2)), axis=1)
+dnets=np.zeros((nvar,)+curves.shape[:2]+(3,))
+dnets[:,:,1:-1,:2]=rng.normal(scale=dnet, size=(nvar, curves.shape[0], curves.shape[1]-2, 2))
+levels[0]=lh; dnets[0]=0.                           # first variant: reference
+
+if out:
+    index=rundesign(curves, levels, odirname, dnets, h, nbno, mode, formats=formats, eltype=eltype)
+    print('Design:', len(index), 'cell meshes,', sum(e['nodes'] for e in index), 'nodes')
+else:
+    print('Design:', sum(1 for mesh in designmeshes(curves, levels, dnets, h, nbno, mode)), 'cell meshes')
+
+#==============================================================================#
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+
+#==============================================================================#
+# Author(s)  : Filippo AGNELLI (LMS / X / CNRS)                                #
+#              e-mail: filippo.agnelli@polytechnique.edu                       #
+#==============================================================================#            
+# Description: Mesh of a shape-shifting panel of N x M unit cells, obtained by #
+#              instancing the shell mesh of the unit cell (no b-spline         #
+#              evaluation per cell), written to Abaqus, AVS-UCD and STL.       #
+#              Work published in F. Agnelli, M. Tricarico, A. Constantinescu.  #
+#              Shape-shifting panel from 3D printed undulated ribbon lattice   #
+#              Extreme Mechanics Letters, Elsevier BV, 2020, 42, 101089        #
+#==============================================================================#
+# Version    : v.2026-10-17 .......................................... pass    #
+#==============================================================================#
+# Risks      : file and directory may be changed over time                     #
+#==============================================================================#
+
+# Options
+out=True                                       # set to True to export mesh data
+graph=True                             # set to True for graphical visualization
+
+# Loading external modules
+from geomdl import exchange                           # import & export b-spline
+from geomdl import multi                                     # geomdl containers
+
+from bspline2mesh import bspline2arrays
+from mesh2file import arrays2file, arrays2polydata
+from mesh2panel import tilecell
+from options import setoptions, srcdir
+
+#==============================================================================#
+# Input arguments
+
+# Input
+idirname=srcdir+'../b-spline/'
+ifilename='ribbon_cell_3d-surf.json'
+	
+# Output
+odirname=srcdir+'../mesh/3d-shell/'
+def ofilename(N,M,h): 
+    nfile='ribbon_panel_'+str(N)+'x'+str(M)+'_h='+str('{:.2f}'.format(h))+'_3d-shell'
+    return nfile
+
+nbno=15                                                   # number of mesh nodes
+chord=None        # chord deviation of adaptive sampling (None: nbno uniform)
+hmax=0.05                          # max element length of adaptive sampling
+mode='tri'                                  # triangulation: 'tri' or 'quad'
+precision='double'          # 'single': float32 nodes, int32 cells, half memory
+eltype=None                  # Abaqus element type (None: S3 or S4R), e.g. 'S4'
+
+# Panel
+#=======
+h=0.4                                                 # height of the unit cell
+N=10                                               # number of cells along x
+M=10                                               # number of cells along y
+lhp=None                                   # height of every cell (N x M array)
+#lhp=[[0.24+0.56*i/(N-1)]*M for i in range(N)]                # gradient along x
+
+setoptions(globals())                      # key=value options of command line
+
+#==============================================================================#
+# Main code
+
+# import elementary pattern
+cell0=multi.SurfaceContainer()	
+cell0.add(exchange.import_json(idirname+ifilename))
+
+# mesh the unit cell once, then tile it
+for h, points, cells in bspline2arrays(cell0, nbno, [h], mode, chord=chord, hmax=hmax,
+                                      precision=precision):
+    points, cells=tilecell(points, cells, N, M, lhp)
+    print('Panel', N, 'x', M, ':', len(points), 'nodes')
+
+# export mesh to every format at once
+    if out:
+        arrays2file(points, cells, {'avsucd':odirname+'avs-ucd/'+ofilename(N,M,h)+'.avs',
+                                    'abaqus':odirname+'abaqus/'+ofilename(N,M,h)+'.inp',
+                                    'stl':odirname+'stl/'+ofilename(N,M,h)+'.stl',
+                                    'npz':odirname+'npz/'+ofilename(N,M,h)+'.npz'}, eltype)
+
+# show the panel mesh
+    if graph:
+        arrays2polydata(points, cells).plot(show_edges=True)    # pyvista window
+
+#==============================================================================#
@@ -21,27 +21,36 @@ out=True                                       # set to True to export mesh data
 graph=True                             # set to True for graphical visualization
 
 # Loading external modules
-import numpy as np
 from geomdl import exchange                           # import & export b-spline
 from geomdl import multi                                     # geomdl containers
-import pyvista as pv
 
-from bspline2mesh import bspline2mesh
+from instrument import enable, stage
+from options import setoptions, srcdir
+from sweep import chunks, runsweep, shellmeshcase
 
 #==============================================================================#
 # Input arguments
 
 # Input
-idirname='../b-spline/'
+idirname=srcdir+'../b-spline/'
 ifilename='ribbon_wall_3d-surf.json'
 	
 # Output
-odirname='../mesh/3d-shell/'
+odirname=srcdir+'../mesh/3d-shell/'
 def ofilename(nu,h): 
     nfile='ribbon_wall_nu='+str('{:.2f}'.format(nu[0]))+'-'+str('{:.2f}'.format(nu[1]))+'_h='+str('{:.2f}'.format(h))+'_3d-shell'
     return nfile
 
 nbno=15                                                   # number of mesh nodes
+chord=None        # chord deviation of adaptive sampling (None: nbno uniform)
+hmax=0.05                          # max element length of adaptive sampling
+mode='tri'                                  # triangulation: 'tri' or 'quad'
+precision='double'          # 'single': float32 nodes, int32 cells, half memory
+eltype=None                  # Abaqus element type (None: S3 or S4R), e.g. 'S4'
+workers=None                      # number of processes (None: all cores)
+stats=None             # JSON lines file of stage times and counters (None: off)
+memory=False                # set to True to trace the memory peak of every case
+profile=None                 # index of the case run under cProfile (None: none)
 
 # Height
 #=======    
@@ -60,31 +69,37 @@ domain = (0.,1.)
 ld = [domain]
 #ld = [(round(0.05*i,3),round(1-0.05*i,3)) for i in range(10)]
 
+setoptions(globals())                      # key=value options of command line
+
 #==============================================================================#
 # Main code
 
-for h in lh:
-    
-    print('Height',h)
-    for domain in ld:
-
 # import elementary pattern
-        cell0=multi.SurfaceContainer()	
-        cell0.add(exchange.import_json(idirname+ifilename))
-
-        for surf in cell0:
-            surf.ctrlpts=(np.array(surf.ctrlpts)*np.array([1,1,h])).tolist()
-
-#       convert b-spline to mesh
-        cellmesh=bspline2mesh(cell0, nbno) 
-	
-# export mesh to any Meshio format
-        if out:
-            pv.save_meshio(odirname+'avs-ucd/'+ofilename(domain,h)+'.avs',
-                           cellmesh, file_format="avsucd")
-            pv.save_meshio(odirname+'abaqus/'+ofilename(domain,h)+'.inp',
-                           cellmesh, file_format="abaqus")
-            pv.save_meshio(odirname+'stl/'+ofilename(domain,h)+'.stl',
-                           cellmesh, file_format="stl", binary=True)
+enable(stats is not None, memory)
+with stage('import'):
+    cell0=multi.SurfaceContainer()	
+    cell0.add(exchange.import_json(idirname+ifilename))
+
+# one case per chunk of heights, meshed as a family, files for every domain
+cases=[]
+for lhk in chunks(lh, workers):
+    lofiles=[]
+    for h in lhk:
+        lofiles.append([])
+        for domain in ld:
+            ofiles=dict()
+            if out:                                # export mesh to every format
+                ofiles['avsucd']=odirname+'avs-ucd/'+ofilename(domain,h)+'.avs'
+                ofiles['abaqus']=odirname+'abaqus/'+ofilename(domain,h)+'.inp'
+                ofiles['stl']=odirname+'stl/'+ofilename(domain,h)+'.stl'
+                ofiles['npz']=odirname+'npz/'+ofilename(domain,h)+'.npz'
+            lofiles[-1].append(ofiles)
+    cases.append(dict(ifile=ifilename, lh=lhk, dens=nbno, mode=mode, lofiles=lofiles,
+                      ld=ld, chord=chord, hmax=hmax, precision=precision, eltype=eltype))
+
+# convert b-spline to mesh, over a process pool
+if __name__=='__main__':
+    summary=runsweep(shellmeshcase, cases, {ifilename: cell0}, workers,
+                     stats=stats, memory=memory, profile=profile)
 
 #==============================================================================#
@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+
+#==============================================================================#
+# Author(s)  : Filippo AGNELLI (LMS / X / CNRS)                                #
+#              e-mail: filippo.agnelli@polytechnique.edu                       #
+#==============================================================================#
+# Description: Batched skeletonization of cell images. Only one quadrant of a  #
+#              cell is skeletonized, padded with its mirror images (the cell   #
+#              is symmetric about its mid-lines, so that this is its periodic  #
+#              extension), and superimposed with its 4 rotations. Crops of     #
+#              one or many scans are processed over a process pool. Skeleton   #
+#              pixels are then ordered along the curve by a graph tracer.      #
+#==============================================================================#
+# Version    : v.2026-10-17 .......................................... pass    #
+#==============================================================================#
+# Risks      : square cells with 4-fold symmetry, dark walls on white          #
+#==============================================================================#
+
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+def readgray(ifile):
+    """
+    Grayscale image of a scan (cv2.IMREAD_GRAYSCALE).
+    """
+    import cv2                                     # cv2 is imported when needed
+    img=cv2.imread(ifile, 0)
+    if img is None:
+        print('cannot read image', ifile)
+        exit(1)
+    return img
+
+def binarize(img, thresh=200):
+    """
+    Binary image, 255 above thresh and 0 elsewhere (cv2.THRESH_BINARY).
+    """
+    return np.where(img>thresh, 255, 0).astype(np.uint8)
+
+def cropbatch(img, boxes, thresh=200):
+    """
+    Binarized square crops of a grayscale scan.
+
+    :param boxes: list of (row, column, size) of the upper left corners
+    :return: list of crops
+    """
+    return [binarize(img[r:r+s, c:c+s], thresh) for r, c, s in boxes]
+
+def quadrantskeleton(img, pad=20):
+    """
+    Skeleton of the upper right quadrant of a cell image, superimposed with
+    its rotations by 90, 180 and 270 degrees, and its cloud of points
+    (pixel indices scaled by the cell size).
+
+    :return: skeleton (boolean, h/2 x w/2) and cloud (n x 2)
+    """
+    from skimage.morphology import skeletonize     # imported when needed (slow)
+    h, w=img.shape
+    quad=img[0:int(h/2), int(w/2):w]<img.max()                   # dark walls
+    skel=skeletonize(np.pad(quad, pad, mode='symmetric'))[pad:-pad, pad:-pad]
+    skel=np.maximum.reduce([np.rot90(skel, k) for k in range(4)])
+    return skel, np.argwhere(skel)/h
+
+def skeletonbatch(imgs, pad=20, workers=None):
+    """
+    Quadrant skeletons and clouds (see quadrantskeleton) of a list of cell
+    images, over a process pool of workers processes (all cores by default,
+    1 to stay serial).
+
+    :return: list of (skeleton, cloud), in the order of imgs
+    """
+    workers=workers or os.cpu_count()
+    if workers>1 and len(imgs)>1:
+        workers=min(workers, len(imgs))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(quadrantskeleton, imgs, [pad]*len(imgs),
+                                 chunksize=max(1, len(imgs)//(4*workers))))
+    return [quadrantskeleton(img, pad) for img in imgs]
+
+#==============================================================================#
+# Tracing
+
+def skeletongraph(pix):
+    """
+    Sparse adjacency of the 8-connected skeleton pixels pix (n x 2 integers).
+    A diagonal edge is left out when the two pixels are also joined through
+    an orthogonal neighbour, so that a thin curve is a simple path.
+    """
+    from scipy import sparse                     # scipy is imported when needed
+    n=len(pix)
+    pix=pix-pix.min(axis=0)+1
+    grid=np.full(pix.max(axis=0)+2, -1)
+    grid[pix[:,0], pix[:,1]]=np.arange(n)
+    ia=[]; ib=[]
+    for dr, dc in [(0, 1), (1, 0), (1, 1), (1, -1)]:
+        nb=grid[pix[:,0]+dr, pix[:,1]+dc]
+        keep=nb>=0
+        if dr and dc:
+            keep&=(grid[pix[:,0]+dr, pix[:,1]]<0)&(grid[pix[:,0], pix[:,1]+dc]<0)
+        ia.append(np.flatnonzero(keep)); ib.append(nb[keep])
+    ia=np.concatenate(ia); ib=np.concatenate(ib)
+    graph=sparse.coo_matrix((np.ones(len(ia)), (ia, ib)), shape=(n, n))
+    return (graph+graph.T).tocsr()
+
+def prunespurs(graph, spur):
+    """
+    Remove the branches of less than spur pixels going from an end point to
+    a junction, until there are none left. End points are collected once and
+    peeled from a queue, a junction left with one neighbour joining it, so
+    that every pixel is walked through a bounded number of times.
+
+    :return: boolean mask of the pixels kept
+    """
+    n=graph.shape[0]
+    ind=graph.indices.tolist(); ptr=graph.indptr.tolist()
+    deg=np.diff(ptr).tolist()
+    kept=[d>0 for d in deg]
+    def walk(prev, cur):                                 # next pixel along path
+        return next(q for q in ind[ptr[cur]:ptr[cur+1]] if kept[q] and q!=prev)
+    queue=deque(i for i in range(n) if deg[i]==1)
+    while queue:
+        e=queue.popleft()
+        if deg[e]!=1:
+            continue
+        path=[e]; prev=e; cur=walk(e, e)
+        while deg[cur]==2 and len(path)<spur:
+            prev, cur=cur, walk(prev, cur)
+            path.append(prev)
+        if deg[cur]>=3 and len(path)<spur:
+            for p in path:
+                kept[p]=False; deg[p]=0
+            deg[cur]-=1
+            if deg[cur]==1:                                # junction now an end
+                queue.append(cur)
+    return np.array(kept, dtype=bool)
+
+def tracecloud(cloud, step, start=None, spur=5, npts=None):
+    """
+    Order the points of a skeleton cloud along the curve, from end point to
+    end point. Spurs shorter than spur pixels are pruned, then the longest
+    path of the largest connected piece (double breadth-first search) is
+    kept, which drops the remaining side branches.
+
+    :param step: pixel size of the cloud (1/h for the clouds of quadrantskeleton)
+    :param start: the path starts from the end point closest to start
+    :param npts: number of points kept, evenly spaced along the path (all if None)
+    :return: ordered cloud (m x 2)
+    """
+    from scipy.sparse.csgraph import breadth_first_order, connected_components
+    cloud=np.asarray(cloud, dtype=float)
+    graph=skeletongraph(np.rint(cloud/step).astype(int))
+    keep=np.flatnonzero(prunespurs(graph, spur))
+    graph=graph[keep][:,keep]
+
+    ncomp, lab=connected_components(graph, directed=False)
+    main=np.flatnonzero(lab==np.argmax(np.bincount(lab)))
+    graph=graph[main][:,main]
+    u=breadth_first_order(graph, 0, directed=False, return_predecessors=False)[-1]
+    order, pred=breadth_first_order(graph, u, directed=False)
+    path=[order[-1]]
+    while path[-1]!=u:
+        path.append(pred[path[-1]])
+    path=cloud[keep[main[path]]]
+
+    if start is not None and np.linalg.norm(path[-1]-start)<np.linalg.norm(path[0]-start):
+        path=path[::-1]
+    if npts is not None and npts<len(path):
+        s=np.concatenate([[0.], np.cumsum(np.linalg.norm(np.diff(path, axis=0), axis=1))])
+        idx=np.searchsorted(s, np.linspace(0., s[-1], npts))
+        path=path[np.unique(np.minimum(idx, len(path)-1))]
+    return path
+
+#==============================================================================#
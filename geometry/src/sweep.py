@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+
+#==============================================================================#
+# Author(s)  : Filippo AGNELLI (LMS / X / CNRS)                                #
+#              e-mail: filippo.agnelli@polytechnique.edu                       #
+#==============================================================================#
+# Description: Parallel executor for parametric studies (height, domain, nu).  #
+#              The b-spline input is parsed once and handed to every worker of #
+#              a process pool at start-up; each case is timed and failures are #
+#              collected into a summary instead of stopping the sweep. A task  #
+#              running several cases (e.g. a chunk of heights meshed as one    #
+#              family) times them and reports one entry per case. Stage        #
+#              times, counters and memory peak of every case can be written as #
+#              JSON lines, and one case can be run under a profiler.           #
+#==============================================================================#
+# Version    : v.2026-10-17 .......................................... pass    #
+#==============================================================================#
+# Risks      : tasks must be importable functions (not defined in scripts)     #
+#==============================================================================#
+
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+import instrument
+from bspline2mesh import bspline2arrays
+from mesh2file import arrays2file
+
+shared=dict()                        # parsed b-spline input of current process
+lazymodules=['scipy.sparse', 'scipy.sparse.csgraph', 'scipy.spatial'] # of tasks
+
+def initworker(geoms, stats=False, memory=False):
+    shared.clear()
+    shared.update(geoms)
+    instrument.enable(stats, memory)
+    instrument.preload(lazymodules)             # import stage of the first case
+
+def lasterror():
+    """
+    Last line of the exception being handled, e.g. 'ValueError: ...'.
+    """
+    return traceback.format_exc(limit=1).strip().splitlines()[-1]
+
+def caseentry(case, t0, err=None):
+    """
+    Summary entry of a case started at t0: case, time and error (None if
+    ok), stage times and counters since the last reset if the
+    instrumentation is enabled.
+    """
+    entry=dict(case, time=time.perf_counter()-t0, error=err)
+    snap=instrument.snapshot()
+    if snap is not None:
+        entry.update(snap, pid=os.getpid())
+    return entry
+
+def runcase(task, case, pfile=None, profiler='cprofile'):
+    """
+    Run one task and return its summary entries: the entries the task
+    returns, one per case it ran (see shellmeshcase), or else the entry of
+    the task itself. With pfile, the task is run under the profiler, whose
+    output is written to pfile.
+    """
+    instrument.reset()
+    t0=time.perf_counter()
+    try:
+        with instrument.profiling(pfile, profiler) if pfile else instrument.nostage:
+            entries=task(shared, **case)
+        err=None
+    except Exception:
+        entries, err=None, lasterror()
+    return [caseentry(case, t0, err)] if entries is None else entries
+
+def runsweep(task, cases, geoms, workers=None, stats=None, memory=False,
+             profile=None, profiler='cprofile'):
+    """
+    Run task(geoms, **case) for every case (dict of keyword arguments) over a
+    process pool. A task may run several cases and return their summary
+    entries (see runcase).
+
+    :param geoms: parsed input shared by all cases, e.g. {filename: container}
+    :param workers: number of processes (None: all cores, 1: serial)
+    :param stats: JSON lines file of the stage times, counters and memory
+                  peak of every case, and of the sweep (None: disabled)
+    :param memory: trace the memory peak of every case (see instrument)
+    :param profile: index of the task run under the profiler ('cprofile' or
+                    'sample'), its output being written next to stats
+    :return: summary, one dict per case with its time and error (None if ok)
+    """
+    workers=min(workers or os.cpu_count(), len(cases)) or 1
+    t0=time.perf_counter()
+    head=instrument.snapshot()       # stages of the script, e.g. import
+    lpfile=[None]*len(cases)
+    if profile is not None:
+        lpfile[profile]=os.path.splitext(stats or task.__name__)[0]+'_case%d'%profile \
+                        +('.prof' if profiler=='cprofile' else '.txt')
+    if workers==1:
+        initworker(geoms, stats is not None, memory)
+        lentries=[runcase(task, case, pfile, profiler) for case, pfile in zip(cases, lpfile)]
+        instrument.enable(head is not None)
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=initworker,
+                                 initargs=(geoms, stats is not None, memory)) as pool:
+            lentries=list(pool.map(runcase, [task]*len(cases), cases, lpfile,
+                                   [profiler]*len(cases)))
+    summary=[e for entries in lentries for e in entries]
+
+    failed=[s for s in summary if s['error'] is not None]
+    print('Sweep: %d cases, %d failed, %d tasks, %d workers, %.2f s (cases %.2f s)'
+          %(len(summary), len(failed), len(cases), workers, time.perf_counter()-t0,
+            sum(s['time'] for s in summary)))
+    for s in failed:
+        print('  failed', {k:v for k, v in s.items() if k not in ('time', 'error')}, s['error'])
+    if stats is not None:
+        sweep=dict(sweep=task.__name__, cases=len(summary), failed=len(failed),
+                   tasks=len(cases), workers=workers, time=time.perf_counter()-t0,
+                   peakrss=instrument.peakrss())      # of the main process only
+        sweep.update(head or dict())
+        os.makedirs(os.path.dirname(stats) or '.', exist_ok=True)
+        instrument.writejsonl(stats, summary+[sweep])
+    return summary
+
+def chunks(items, n=None):
+    """
+    Split items into n interleaved chunks (None: one per core), so that
+    every worker gets a share of cheap and costly items.
+    """
+    n=min(n or os.cpu_count(), len(items)) or 1
+    return [items[k::n] for k in range(n)]
+
+#==============================================================================#
+# Tasks
+
+def shellmeshcase(geoms, ifile, lh, dens, mode, lofiles, ld=None, chord=None,
+                  hmax=None, precision='double', eltype=None):
+    """
+    Shell meshes of the surfaces of ifile for a chunk of heights lh, meshed
+    as one family (see bspline2meshfamily). The mesh of lh[k] is exported to
+    every ofiles of lofiles[k] ({format: filename}, see mesh2file), one per
+    domain of ld, with Abaqus elements eltype (default: S3 or S4R). With
+    chord, the sampling is adaptive (see bspline2mesh); with precision
+    'single', the arrays are float32/int32 (see bspline2arrays).
+
+    :return: summary entries, one per height and domain, the meshing of a
+             height being counted in the entry of its first domain. A height
+             that fails is reported for all its domains and the family is
+             restarted at the next height.
+    """
+    entries=[]
+    k=0
+    while k<len(lh):
+        family=bspline2arrays(geoms[ifile], dens, lh[k:], mode, chord=chord,
+                              hmax=hmax, precision=precision)
+        for h, lof in zip(lh[k:], lofiles[k:]):
+            k+=1
+            instrument.reset()
+            t0=time.perf_counter()
+            try:
+                h, points, cells=next(family)
+                err=None
+            except Exception:
+                err=lasterror()
+            for j, ofiles in enumerate(lof):
+                if j>0:
+                    instrument.reset()
+                    t0=time.perf_counter()
+                e=err
+                if e is None:
+                    try:
+                        arrays2file(points, cells, ofiles, eltype)
+                    except Exception:
+                        e=lasterror()
+                entries.append(caseentry(dict(ifile=ifile, h=h, domain=ld[j] if ld else j),
+                                         t0, e))
+            if err is not None:
+                break
+    return entries
+
+#==============================================================================#